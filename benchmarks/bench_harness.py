@@ -0,0 +1,211 @@
+"""Overhead norm adds on top of training, measured with a model and loader that do no work.
+
+    python benchmarks/bench_harness.py                           # report
+    python benchmarks/bench_harness.py --runs 1 10 100 1000 10000
+    python benchmarks/bench_harness.py --threads-per-run 2 --runs-per-worker 4 --pin-cores
+    python benchmarks/bench_harness.py --save-baseline           # refresh benchmarks/baselines/harness.json
+    python benchmarks/bench_harness.py --check                   # exit 1 on a regression
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from norm._typings import BaseLoader
+from norm.experiments import Experiment, init_runs, run_exp, run_valid
+from norm.experiments.samplers import LogUniform, Uniform
+from norm.io import load
+
+BASELINE = Path(__file__).parent / 'baselines' / 'harness.json'
+
+
+class SyntheticNet:
+
+    def __init__(self):
+        self.weights = [0.0]
+
+    def state_dict(self):
+        return dict(weights=list(self.weights))
+
+    def load_state_dict(self, state):
+        self.weights = list(state['weights'])
+
+
+class SyntheticModel:
+    # everything the harness calls, with no training behind it
+
+    def __init__(self, scale: float = 1.0, optim_fn=None):
+        self.net_ = SyntheticNet()
+        self.scale = scale
+        self.lr = optim_fn()['lr']
+        self.steps = 0
+
+    def feedback(self, batch) -> float:
+        self.steps += 1
+        return self.scale / (1 + self.lr * self.steps)
+
+    def restore_model(self, path, device):
+        self.net_.load_state_dict(load(path))
+
+
+class SyntheticLoader(BaseLoader):
+
+    def next(self, batch_size=None):
+        return batch_size
+
+
+def evaluate(model, batch, extras=None, verbose=False):
+    loss = model.scale / (1 + model.lr * model.steps)
+    return {'score': 1 / (1 + loss), 'loss': loss, **(extras or {})}
+
+
+def optim(**kwargs):
+    return kwargs
+
+
+HP_SPACE = {'model': {'scale': Uniform(0.5, 2.0)}, 'optim': {'lr': LogUniform(-4, -1)}}
+
+
+@contextmanager
+def quiet():
+    # console logging is part of the overhead, but not of the report; workers inherit the descriptor
+    sys.stdout.flush()
+    saved = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(devnull)
+        os.close(saved)
+
+
+def disk_usage(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+
+
+def bench_steps(root: Path, train_steps: int, log_every: int):
+    run = init_runs(1, HP_SPACE, SyntheticModel, optim, 0, 32, False, 3, log_every, train_steps, False)[0]
+
+    with quiet():
+        start = time.perf_counter()
+        run_valid(run, evaluate, SyntheticLoader(), SyntheticLoader(), root / 'steps')
+        elapsed = time.perf_counter() - start
+
+    # the profile of the run splits the time per step into its sections
+    profile = load(root / 'steps' / run.name / 'profile_0.json')
+    sections = {path.split('/')[-1]: stats['total'] / train_steps * 1e6
+                for path, stats in profile.items() if path.startswith('trial/step/')}
+
+    return dict(us_per_step=elapsed / train_steps * 1e6, sections_us_per_step=sections)
+
+
+def bench_runs(root: Path, backend: str, num_runs: int, num_workers: int, train_steps: int, log_every: int, **resources):
+    runs = init_runs(num_runs, HP_SPACE, SyntheticModel, optim, 0, 32, False, 3, log_every, train_steps, False)
+    save_path = root / f'{backend}_{num_runs}'
+    num_cpus = 1 if backend == 'sequential' else num_workers
+
+    with quiet():
+        start = time.perf_counter()
+        exp = Experiment(runs, evaluate, save_path, num_cpus=num_cpus, num_test_trials=1,
+                         backend='process' if backend == 'sequential' else backend, **resources)
+        run_exp(exp, SyntheticLoader(), SyntheticLoader(), SyntheticLoader(), save_path)
+        elapsed = time.perf_counter() - start
+
+    return dict(runs_per_second=num_runs / elapsed,
+                seconds=elapsed,
+                bytes_per_run=disk_usage(save_path) / num_runs)
+
+
+def compare(results, baseline, tolerance):
+    failures = []
+
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+
+        if 'us_per_step' in result and result['us_per_step'] > reference['us_per_step'] * (1 + tolerance):
+            failures.append(f"{name}: {result['us_per_step']:.1f}us per step, baseline {reference['us_per_step']:.1f}us")
+
+        if 'runs_per_second' in result and result['runs_per_second'] < reference['runs_per_second'] / (1 + tolerance):
+            failures.append(f"{name}: {result['runs_per_second']:.1f} runs/s, baseline {reference['runs_per_second']:.1f}")
+
+        if 'bytes_per_run' in result and result['bytes_per_run'] > reference['bytes_per_run'] * (1 + tolerance):
+            failures.append(f"{name}: {result['bytes_per_run']:.0f} bytes per run, baseline {reference['bytes_per_run']:.0f}")
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--backends', nargs='+', default=['sequential', 'process', 'ray'])
+    parser.add_argument('--workers', type=int, default=max(2, os.cpu_count() or 1))
+    parser.add_argument('--train-steps', type=int, default=100)
+    parser.add_argument('--log-every', type=int, default=10)
+    parser.add_argument('--steps', type=int, default=20000, help="training steps of the per-step measurement")
+    parser.add_argument('--threads-per-run', type=int, default=1)
+    parser.add_argument('--runs-per-worker', type=int, default=1)
+    parser.add_argument('--pin-cores', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.5)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--check', action='store_true')
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp())
+    results = {}
+
+    try:
+        steps = results['steps'] = bench_steps(root, args.steps, args.log_every)
+        print(f"harness overhead: {steps['us_per_step']:.1f}us per step")
+        for section, us in steps['sections_us_per_step'].items():
+            print(f"  {section:<12}{us:>10.1f}us")
+
+        print(f"{'backend':<12}{'runs':>8}{'runs/s':>10}{'seconds':>10}{'KB/run':>10}")
+        for backend in args.backends:
+            if backend == 'ray':
+                try:
+                    import ray
+                except ImportError:
+                    print(f"{backend:<12}{'ray not installed':>48}")
+                    continue
+
+                # the cluster start is not part of the harness, neither are worker logs
+                ray.init(log_to_driver=False, ignore_reinit_error=True)
+
+            for num_runs in args.runs:
+                result = bench_runs(root, backend, num_runs, args.workers, args.train_steps, args.log_every,
+                                    threads_per_run=args.threads_per_run,
+                                    runs_per_worker=args.runs_per_worker,
+                                    pin_cores=args.pin_cores)
+                results[f'{backend}_{num_runs}'] = result
+                print(f"{backend:<12}{num_runs:>8}{result['runs_per_second']:>10.1f}"
+                      f"{result['seconds']:>10.2f}{result['bytes_per_run'] / 1024:>10.1f}")
+    finally:
+        shutil.rmtree(root)
+
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    failures = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        BASELINE.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE.write_text(json.dumps(results, indent=2) + '\n')
+        print(f"[info]: baseline saved to {BASELINE}")
+
+    for failure in failures:
+        print(f"[warning]: {failure}")
+
+    if args.check and failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
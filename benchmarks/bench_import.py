@@ -0,0 +1,84 @@
+"""Import time of norm's subpackages, checked against a stored baseline.
+
+    python benchmarks/bench_import.py                  # report
+    python benchmarks/bench_import.py --save-baseline  # refresh benchmarks/baselines/import_time.json
+    python benchmarks/bench_import.py --check          # exit 1 on a regression
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+MODULES = ['norm', 'norm.io', 'norm.experiments', 'norm.experiments.samplers', 'norm.plots', 'norm.results', 'norm.loaders']
+
+# none of these should be imported by just importing a norm module
+HEAVY = ['torch', 'clrs', 'rich', 'ray', 'matplotlib', 'scipy', 'pandas', 'randomname']
+
+BASELINE = Path(__file__).parent / 'baselines' / 'import_time.json'
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(repr((elapsed, sorted(m for m in {heavy!r} if m in sys.modules))))
+"""
+
+
+def measure(module: str, repeat: int):
+    # every sample runs in a fresh interpreter, so nothing is cached in sys.modules
+    samples, heavy = [], []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', _PROBE.format(module=module, heavy=HEAVY)],
+                             capture_output=True, text=True, check=True).stdout
+        elapsed, heavy = eval(out)
+        samples.append(elapsed)
+
+    return min(samples), heavy
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.5, help="allowed relative slowdown over the baseline")
+    parser.add_argument('--slack', type=float, default=0.02, help="allowed absolute slowdown in seconds, absorbs noise on fast imports")
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--check', action='store_true')
+    args = parser.parse_args()
+
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    results, failures = {}, []
+
+    print(f"{'module':<28}{'ms':>10}{'baseline':>10}  heavy imports")
+    for module in MODULES:
+        elapsed, heavy = measure(module, args.repeat)
+        results[module] = dict(seconds=elapsed, heavy=heavy)
+
+        reference = baseline.get(module)
+        print(f"{module:<28}{elapsed * 1e3:>10.1f}{reference['seconds'] * 1e3 if reference else float('nan'):>10.1f}  {', '.join(heavy)}")
+
+        if reference is None:
+            continue
+
+        if elapsed > reference['seconds'] * (1 + args.tolerance) + args.slack:
+            failures.append(f"{module} takes {elapsed * 1e3:.1f}ms, baseline {reference['seconds'] * 1e3:.1f}ms")
+
+        new_heavy = sorted(set(heavy) - set(reference['heavy']))
+        if new_heavy:
+            failures.append(f"{module} now imports {', '.join(new_heavy)}")
+
+    if args.save_baseline:
+        BASELINE.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE.write_text(json.dumps(results, indent=2) + '\n')
+        print(f"[info]: baseline saved to {BASELINE}")
+
+    for failure in failures:
+        print(f"[warning]: {failure}")
+
+    if args.check and failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Throughput and size of norm.io.dump/load against plain in-place writes.
+
+    python benchmarks/bench_io.py --num-runs 200 --repeat 3
+"""
+import argparse
+import json
+import pickle
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from norm.io import dump, load
+
+
+def make_payload(num_runs: int, steps: int, seed: int = 0):
+    # shaped like a results tree: per-run configs, loss curves and logged stats
+    gen = np.random.default_rng(seed)
+    return {
+        f'run_{i}': {
+            'config': {'lr': float(gen.random()), 'hidden': int(gen.integers(16, 512)), 'optimizer': 'adam'},
+            'loss': np.cumsum(gen.random(steps)).tolist(),
+            'vl_scores': [{'step': step, 'score': float(gen.random())} for step in range(0, steps, 10)],
+        }
+        for i in range(num_runs)
+    }
+
+
+def legacy_dump(obj, path: Path):
+    # what norm.io used to do: write in place through a handle that is never closed
+    if path.suffix == '.json':
+        json.dump(obj, path.open('w'), indent=2)
+    else:
+        pickle.dump(obj, path.open('wb'))
+
+
+def legacy_load(path: Path):
+    if path.suffix == '.json':
+        return json.load(path.open('r'))
+
+    return pickle.load(path.open('rb'))
+
+
+def timed(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def available(suffix: str) -> bool:
+    if not suffix.endswith('.zst'):
+        return True
+
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num-runs', type=int, default=200)
+    parser.add_argument('--steps', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    payload = make_payload(args.num_runs, args.steps)
+    raw_mb = len(pickle.dumps(payload)) / 2 ** 20
+    root = Path(tempfile.mkdtemp())
+
+    cases = [('legacy', suffix, legacy_dump, legacy_load) for suffix in ('.pkl', '.json')]
+    cases += [('in-place', suffix, lambda o, p: dump(o, p, atomic=False), load) for suffix in ('.pkl', '.json')]
+    cases += [('atomic', suffix, dump, load) for suffix in ('.pkl', '.json', '.pkl.gz', '.pkl.bz2', '.pkl.xz', '.pkl.zst', '.json.gz')]
+
+    print(f"payload: {args.num_runs} runs x {args.steps} steps, {raw_mb:.1f} MB pickled")
+    print(f"{'mode':<10}{'suffix':<10}{'write MB/s':>12}{'read MB/s':>12}{'size MB':>10}{'ratio':>8}")
+
+    try:
+        for mode, suffix, dump_, load_ in cases:
+            if not available(suffix):
+                print(f"{mode:<10}{suffix:<10}{'zstandard not installed':>52}")
+                continue
+
+            path = root / f'{mode}{suffix}'
+            write = timed(lambda: dump_(payload, path), args.repeat)
+            read = timed(lambda: load_(path), args.repeat)
+            size_mb = path.stat().st_size / 2 ** 20
+
+            print(f"{mode:<10}{suffix:<10}{raw_mb / write:>12.1f}{raw_mb / read:>12.1f}{size_mb:>10.1f}{raw_mb / size_mb:>8.2f}")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
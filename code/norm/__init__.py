@@ -1,8 +1,20 @@
+from weakref import WeakSet
+
+# background producers, e.g. prefetching loaders, stopped before the global RNGs are reseeded
+_RNG_USERS = WeakSet()
+
+
+def _stop_rng_users():
+    for user in list(_RNG_USERS):
+        user.close()
+
+
 def set_seed(seed):
     import numpy as np
     import torch
     import random
 
+    _stop_rng_users()
     random.seed(seed)
     np.random.seed(seed)
     torch.manual_seed(seed)
@@ -12,3 +24,27 @@ def set_seed(seed):
 def get_date():
     from datetime import datetime
     return datetime.utcnow().isoformat()[:-7]
+
+
+def get_rng_state():
+    import numpy as np
+    import torch
+    import random
+
+    return dict(random=random.getstate(),
+                numpy=np.random.get_state(),
+                torch=torch.get_rng_state(),
+                cuda=torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None)
+
+
+def set_rng_state(state):
+    import numpy as np
+    import torch
+    import random
+
+    _stop_rng_users()
+    random.setstate(state['random'])
+    np.random.set_state(state['numpy'])
+    torch.set_rng_state(state['torch'])
+    if state['cuda'] is not None:
+        torch.cuda.set_rng_state_all(state['cuda'])
@@ -4,3 +4,10 @@ from typing import Optional
 class BaseLoader:
     def next(self, batch_size: Optional[int] = None):
         pass
+
+    def state_dict(self) -> Optional[dict]:
+        # loaders that can pick up where they stopped return a copy of their position, checkpoints keep it
+        return None
+
+    def load_state_dict(self, state: dict):
+        pass
@@ -1,5 +1,52 @@
-from ._experiment import Experiment, run_exp, resume_exp  # noqa: F401
-from ._validation import run_valid  # noqa: F401
-from ._test import run_test  # noqa: F401
-from ._random_search import random_search  # noqa: F401
-from ._run import init_runs, Run  # noqa: F401
+from typing import TYPE_CHECKING
+
+# public name -> submodule defining it, submodules are imported on first access
+_EXPORTS = {
+    'Experiment': '_experiment',
+    'run_exp': '_experiment',
+    'resume_exp': '_experiment',
+    'run_valid': '_validation',
+    'run_valid_trial': '_validation',
+    'merge_valid_trials': '_validation',
+    'run_test': '_test',
+    'run_test_trial': '_test',
+    'merge_test_trials': '_test',
+    'random_search': '_random_search',
+    'init_runs': '_run',
+    'Run': '_run',
+    'ASHA': '_scheduler',
+    'TPESearch': '_search',
+    'init_search': '_search',
+    'ResultCache': '_cache',
+    'TopKCheckpoints': '_checkpoints',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    from importlib import import_module
+
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(f'.{_EXPORTS[name]}', __name__), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from ._experiment import Experiment, run_exp, resume_exp  # noqa: F401
+    from ._validation import run_valid, run_valid_trial, merge_valid_trials  # noqa: F401
+    from ._test import run_test, run_test_trial, merge_test_trials  # noqa: F401
+    from ._random_search import random_search  # noqa: F401
+    from ._run import init_runs, Run  # noqa: F401
+    from ._scheduler import ASHA  # noqa: F401
+    from ._search import TPESearch, init_search  # noqa: F401
+    from ._cache import ResultCache  # noqa: F401
+    from ._checkpoints import TopKCheckpoints  # noqa: F401
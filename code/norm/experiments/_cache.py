@@ -0,0 +1,122 @@
+import os
+import shutil
+from ._run import Run
+from norm.io import load
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+_SKIP = ('checkpoint*.pkl', 'model_*.pth')
+
+
+def _qualname(fn: Callable) -> str:
+    return f"{getattr(fn, '__module__', '')}.{getattr(fn, '__qualname__', repr(fn))}"
+
+
+def _canonical(obj: Any) -> Any:
+    # model_fn is a stack of partials around the user's factory, with the optimiser's partial among its
+    # keywords: every level contributes its function, arguments and keywords
+    if hasattr(obj, 'func'):
+        return dict(func=_canonical(obj.func),
+                    args=[_canonical(arg) for arg in obj.args],
+                    keywords={key: _canonical(item) for key, item in obj.keywords.items()})
+
+    if callable(obj):
+        return _qualname(obj)
+
+    return obj
+
+
+def _size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+
+
+class ResultCache:
+
+    def __init__(self, path: Path, max_bytes: int = 1 << 30, namespace: str = ''):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        # neither the data nor evaluate_fn are part of a run, the namespace tells them apart
+        self.namespace = namespace
+        self._total = None
+
+    def key(self, run: Run, num_trials: int, higher_is_better: bool) -> str:
+        import hashlib
+        import json
+
+        canonical = json.dumps(dict(namespace=self.namespace,
+                                    model=_canonical(run.model_fn),
+                                    config=run.config,
+                                    seed=run.seed,
+                                    batch_size=run.batch_size,
+                                    early_stop=run.early_stop,
+                                    early_stop_patience=run.early_stop_patience,
+                                    log_every=run.log_every,
+                                    train_steps=run.train_steps,
+                                    num_trials=num_trials,
+                                    higher_is_better=higher_is_better),
+                               sort_keys=True,
+                               default=str)
+
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.path / key[:2] / key
+
+    def get(self, run: Run, num_trials: int, higher_is_better: bool, run_path: Path) -> Optional[float]:
+        entry = self._entry(self.key(run, num_trials, higher_is_better))
+
+        if not (entry / 'train_info.json').exists():
+            return None
+
+        shutil.copytree(entry, run_path, dirs_exist_ok=True)
+        # mtime tracks the last use, eviction drops the least recently used entries
+        os.utime(entry)
+
+        return load(entry / 'train_info.json')['mean_score']
+
+    def put(self, run: Run, num_trials: int, higher_is_better: bool, run_path: Path):
+        info = load(run_path / 'train_info.json')
+
+        # runs cut short by a scheduler did not see the whole budget
+        if info.get('stopped', False):
+            return
+
+        entry = self._entry(self.key(run, num_trials, higher_is_better))
+        if entry.exists():
+            return
+
+        total = self.size()
+
+        tmp = entry.with_name(f'.{entry.name}.tmp')
+        shutil.copytree(run_path, tmp, ignore=shutil.ignore_patterns(*_SKIP), dirs_exist_ok=True)
+        os.replace(tmp, entry)
+
+        self._total = total + _size(entry)
+        if self._total > self.max_bytes:
+            self._evict()
+
+    def size(self) -> int:
+        if self._total is None:
+            self._total = sum(_size(entry) for entry in self._entries())
+
+        return self._total
+
+    def _entries(self):
+        if not self.path.exists():
+            return []
+
+        return [entry for bucket in self.path.iterdir() if bucket.is_dir()
+                for entry in bucket.iterdir() if not entry.name.startswith('.')]
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        total = sum(_size(entry) for entry in entries)
+
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+
+            total -= _size(entry)
+            shutil.rmtree(entry)
+
+        self._total = total
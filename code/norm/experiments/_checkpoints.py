@@ -0,0 +1,33 @@
+from pathlib import Path
+from typing import Dict, Optional
+
+
+def best_checkpoint(run_path: Path, trial: int = 0) -> Path:
+    return run_path / f'model_{trial}.pth'
+
+
+class TopKCheckpoints:
+    # best validation checkpoints of the k best runs so far, the others are deleted as runs finish
+
+    def __init__(self, path: Path, k: int, higher_is_better: bool = True):
+        self.path = Path(path)
+        self.k = k
+        self.higher_is_better = higher_is_better
+        self.scores: Dict[str, float] = {}
+
+    def add(self, name: str, score: float):
+        # cached and stopped runs come without a checkpoint
+        if not best_checkpoint(self.path / name).exists():
+            return
+
+        self.scores[name] = score
+        ranked = sorted(self.scores, key=self.scores.get, reverse=self.higher_is_better)
+
+        for name_ in ranked[self.k:]:
+            best_checkpoint(self.path / name_).unlink(missing_ok=True)
+            del self.scores[name_]
+
+    def get(self, name: str) -> Optional[Path]:
+        path = best_checkpoint(self.path / name)
+
+        return path if name in self.scores and path.exists() else None
@@ -0,0 +1,291 @@
+import os
+import sys
+from multiprocessing.managers import BaseManager
+from typing import Any, Callable, Dict, List, Optional
+
+_THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+# objects shared with the pool, filled once per process by the initializer
+_SHARED: Dict[int, Any] = {}
+
+
+class _SchedulerHost:
+    # serves one scheduler to every worker, either as a Ray actor or from a manager process
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+
+    def on_result(self, *args) -> bool:
+        return self.scheduler.on_result(*args)
+
+    def get(self):
+        return self.scheduler
+
+
+class _RemoteScheduler:
+
+    def __init__(self, actor):
+        self._actor = actor
+
+    def on_result(self, *args) -> bool:
+        import ray
+        return ray.get(self._actor.on_result.remote(*args))
+
+    def get(self):
+        import ray
+        return ray.get(self._actor.get.remote())
+
+
+def num_slots(num_cpus: int, threads_per_run: int = 1, runs_per_worker: int = 1) -> int:
+    # runs that fit side by side: each worker holds threads_per_run cores and packs runs_per_worker runs on them
+    return max(1, num_cpus // threads_per_run) * runs_per_worker
+
+
+def run_threads(threads_per_run: int = 1, runs_per_worker: int = 1) -> int:
+    # packed runs split the cores of their worker instead of each starting a full pool on them
+    return max(1, threads_per_run // runs_per_worker)
+
+
+def limit_threads(num_threads: int):
+    for var in _THREAD_ENV_VARS:
+        os.environ[var] = str(num_threads)
+
+    # torch reads the variables above when it is first imported, importing it here
+    # would only add seconds to every worker start
+    torch = sys.modules.get('torch')
+    if torch is not None:
+        torch.set_num_threads(num_threads)
+
+    # BLAS pools already started by numpy ignore the variables
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(num_threads)
+    except ImportError:
+        pass
+
+
+class Executor:
+
+    def put(self, obj: Any) -> Any:
+        raise NotImplementedError()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Any:
+        raise NotImplementedError()
+
+    def wait(self, futures: List[Any]) -> List[Any]:
+        raise NotImplementedError()
+
+    def result(self, future: Any) -> Any:
+        raise NotImplementedError()
+
+    def cancel(self, future: Any):
+        raise NotImplementedError()
+
+    def share(self, scheduler: Any) -> Any:
+        raise NotImplementedError()
+
+    def sizeof(self, *args, **kwargs) -> int:
+        raise NotImplementedError()
+
+    def shutdown(self, wait: bool = True):
+        pass
+
+
+class RayExecutor(Executor):
+
+    def __init__(self, num_cpus: int, num_gpus: int, nw: int, threads_per_run: int = 1, runs_per_worker: int = 1):
+        import ray
+
+        ray.init(num_cpus=num_cpus,
+                 num_gpus=num_gpus,
+                 include_dashboard=False,
+                 ignore_reinit_error=True)
+
+        # packed runs ask for a fraction of their worker's cores
+        num_threads = run_threads(threads_per_run, runs_per_worker)
+
+        @ray.remote(num_cpus=threads_per_run / runs_per_worker, num_gpus=1/nw if num_gpus > 0 else 0)
+        def call(fn, *args, **kwargs):
+            limit_threads(num_threads)
+            return fn(*args, **kwargs)
+
+        self._call = call
+
+    def put(self, obj: Any) -> Any:
+        import ray
+        return ray.put(obj)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Any:
+        return self._call.remote(fn, *args, **kwargs)
+
+    def wait(self, futures: List[Any]) -> List[Any]:
+        import ray
+        completed, _ = ray.wait(futures, num_returns=1)
+        return completed
+
+    def result(self, future: Any) -> Any:
+        import ray
+        return ray.get(future)
+
+    def cancel(self, future: Any):
+        import ray
+        ray.cancel(future, force=True)
+
+    def share(self, scheduler: Any) -> Any:
+        import ray
+        return _RemoteScheduler(ray.remote(num_cpus=0)(_SchedulerHost).remote(scheduler))
+
+    def sizeof(self, *args, **kwargs) -> int:
+        from ray import cloudpickle
+        return len(cloudpickle.dumps((args, kwargs)))
+
+
+class _Shared:
+    def __init__(self, key: int):
+        self.key = key
+
+
+def _init_worker(num_threads: int, shared: Dict[int, Any], cores=None):
+    limit_threads(num_threads)
+
+    # each worker takes the next free core set
+    if cores is not None:
+        os.sched_setaffinity(0, cores.get())
+
+    _SHARED.update(shared)
+
+
+def _resolve(arg: Any) -> Any:
+    return _SHARED[arg.key] if isinstance(arg, _Shared) else arg
+
+
+def _call(fn: Callable, args, kwargs):
+    return fn(*map(_resolve, args), **{key: _resolve(item) for key, item in kwargs.items()})
+
+
+class _Manager(BaseManager):
+    pass
+
+
+_Manager.register('SchedulerHost', _SchedulerHost)
+
+
+def core_sets(num_sets: int, num_threads: int, runs_per_worker: int = 1) -> List[List[int]]:
+    # consecutive runs share the cores of their worker, workers wrap around the available cores
+    available = sorted(os.sched_getaffinity(0))
+
+    return [[available[(i // runs_per_worker * num_threads + j) % len(available)] for j in range(num_threads)]
+            for i in range(num_sets)]
+
+
+class ProcessExecutor(Executor):
+
+    def __init__(self, num_workers: int, num_threads: int = 1, runs_per_worker: int = 1, pin_cores: bool = False):
+        self.num_workers = num_workers
+        # cores of a worker, split between the runs packed on it
+        self.num_threads = num_threads
+        self.runs_per_worker = runs_per_worker
+        self.pin_cores = pin_cores
+        self._shared: Dict[int, Any] = {}
+        self._pool = None
+        self._manager = None
+
+    def _core_queue(self, ctx) -> Optional[Any]:
+        if not self.pin_cores:
+            return None
+
+        if not hasattr(os, 'sched_setaffinity'):
+            print("[warning]: core pinning is not supported on this platform.")
+            return None
+
+        cores = ctx.SimpleQueue()
+        for core_set in core_sets(self.num_workers, self.num_threads, self.runs_per_worker):
+            cores.put(core_set)
+
+        return cores
+
+    def _get_pool(self):
+        from concurrent.futures import ProcessPoolExecutor
+        from multiprocessing import get_context
+
+        # workers are reused across tasks, shared objects reach each of them only once
+        if self._pool is None:
+            ctx = get_context('spawn')
+            self._pool = ProcessPoolExecutor(max_workers=self.num_workers,
+                                             mp_context=ctx,
+                                             initializer=_init_worker,
+                                             initargs=(run_threads(self.num_threads, self.runs_per_worker), dict(self._shared),
+                                                       self._core_queue(ctx)))
+
+        return self._pool
+
+    def put(self, obj: Any) -> Any:
+        # the test stage shares the loaders of the validation stage again, they are shipped only once
+        for key, shared in self._shared.items():
+            if shared is obj:
+                return _Shared(key)
+
+        key = len(self._shared)
+        self._shared[key] = obj
+
+        # workers only receive shared objects when they start
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+        return _Shared(key)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Any:
+        return self._get_pool().submit(_call, fn, args, kwargs)
+
+    def wait(self, futures: List[Any]) -> List[Any]:
+        from concurrent.futures import wait, FIRST_COMPLETED
+        completed, _ = wait(futures, return_when=FIRST_COMPLETED)
+        return list(completed)
+
+    def result(self, future: Any) -> Any:
+        return future.result()
+
+    def cancel(self, future: Any):
+        future.cancel()
+
+    def share(self, scheduler: Any) -> Any:
+        from multiprocessing import get_context
+
+        if self._manager is None:
+            self._manager = _Manager(ctx=get_context('spawn'))
+            self._manager.start()
+
+        return self._manager.SchedulerHost(scheduler)
+
+    def sizeof(self, *args, **kwargs) -> int:
+        import pickle
+        return len(pickle.dumps((args, kwargs)))
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+def make_executor(backend: str,
+                  num_cpus: int,
+                  num_gpus: int,
+                  nw: int,
+                  threads_per_run: int = 1,
+                  runs_per_worker: int = 1,
+                  pin_cores: bool = False) -> Executor:
+
+    if backend == 'ray':
+        if pin_cores:
+            print("[warning]: core pinning is only available with the process backend.")
+        return RayExecutor(num_cpus, num_gpus, nw, threads_per_run, runs_per_worker)
+
+    if backend == 'process':
+        return ProcessExecutor(num_slots(num_cpus, threads_per_run, runs_per_worker), threads_per_run, runs_per_worker, pin_cores)
+
+    raise ValueError(f"unknown backend '{backend}'")
@@ -1,12 +1,19 @@
+from ._cache import ResultCache
+from ._checkpoints import TopKCheckpoints
+from ._executor import make_executor, num_slots, run_threads
 from ._run import Run
-from ._validation import run_valid as validate_run
-from ._test import run_test
+from ._search import Search
+from ._scheduler import ASHA
+from ._validation import run_valid as validate_run, run_valid_trial, merge_valid_trials
+from ._test import run_test, run_test_trial, merge_test_trials
 from norm._typings import BaseLoader
 from norm import get_date
-from norm.io import dump, load
+from norm.io import AsyncDumper, dump, load, append
+from norm.results import ResultsIndex
 from pathlib import Path
-from statistics import mean, stdev
-from typing import Callable, List
+from statistics import mean
+from time import perf_counter
+from typing import Callable, List, Optional, Union
 
 NOT_DEFINED = "ND"
 RESUME_EXP_DIR = "__experiment_status__"
@@ -17,73 +24,237 @@ def get_name():
     return generate('v/programming', 'n/algorithms')
 
 
-def _init_ray(num_cpus: int, num_gpus: int, nw: int):
-    import ray
-    ray.init(num_cpus=num_cpus,
-             num_gpus=num_gpus,
-             include_dashboard=False)
+def _dump_best(exp, best_run, best_score, save_path, dump_=dump):
+    dump_({
+        'meta': {
+            'name': best_run.name,
+            'vl_score': best_score,
+            'date': get_date()
+        },
+        'config': best_run.config,
+    }, save_path / exp.name / 'best_run.json')
+
+
+def _share(exp, *objs):
+    # shared inputs are serialised once, tasks only carry their references
+    return [exp.executor.put(obj) for obj in objs]
+
+
+def _report_transfer(exp, task_bytes, save_path, stage):
+    report = dict(stage=stage,
+                  num_tasks=len(task_bytes),
+                  task_bytes_mean=mean(task_bytes) if task_bytes else 0,
+                  task_bytes_max=max(task_bytes, default=0))
+
+    print(f"[info]: {stage} shipped {report['task_bytes_mean']:.0f} bytes per task.")
+    append(report, save_path / exp.name / 'transfer.jsonl')
+
+
+def _report_throughput(exp, results, save_path):
+    seconds = perf_counter() - results.start
+    report = dict(num_runs=results.num_trained,
+                  seconds=seconds,
+                  runs_per_hour=results.num_trained / seconds * 3600 if seconds > 0 else 0,
+                  backend='sequential' if exp.sequential else exp.backend,
+                  num_cpus=exp.num_cpus,
+                  threads_per_run=exp.threads_per_run,
+                  runs_per_worker=exp.runs_per_worker,
+                  threads=run_threads(exp.threads_per_run, exp.runs_per_worker),
+                  pin_cores=exp.pin_cores,
+                  max_in_flight=exp.max_in_flight or exp.slots)
+
+    print(f"[info]: trained {report['num_runs']} runs at {report['runs_per_hour']:.1f} runs per hour.")
+    append(report, save_path / exp.name / 'throughput.jsonl')
+
+
+class _Results:
+    # collects scores as runs finish, persisting each of them and the best so far
+
+    def __init__(self, exp, save_path):
+        HIGH_ = 1e4
+        LOW_ = -HIGH_
+
+        self.exp = exp
+        self.save_path = save_path
+        self.scores = {}
+        self.best_score = LOW_ if exp.higher_is_better else HIGH_
+        self.best_run = None
+        self.num_trained = 0
+        self.start = perf_counter()
+        # bookkeeping writes leave the driver free to hand out the next runs
+        self.writer = AsyncDumper(num_workers=1 if exp.async_io else 0)
+        self.checkpoints = TopKCheckpoints(save_path / exp.name, exp.keep_top_k, exp.higher_is_better) if exp.keep_top_k else None
+        # the test stage reuses what the store retained
+        exp.checkpoints = self.checkpoints
+
+    def add(self, run, score, cached=False):
+        exp = self.exp
+        is_better = lambda a, b: a > b if exp.higher_is_better else a < b  # noqa: E731
+
+        self.scores[run.name] = score
+        exp.search.tell(run, score)
+        self.writer.append({'name': run.name, 'score': score, 'cached': cached}, self.save_path / exp.name / 'scores.jsonl')
+
+        if not cached:
+            self.num_trained += 1
+
+        if not cached and exp.cache is not None:
+            exp.cache.put(run, exp.num_valid_trials, exp.higher_is_better, self.save_path / exp.name / run.name)
+
+        if exp.index is not None:
+            exp.index.add_run(self.save_path / exp.name / run.name, exp.name)
+
+        if self.checkpoints is not None:
+            self.checkpoints.add(run.name, score)
+
+        if is_better(score, self.best_score):
+            self.best_score, self.best_run = score, run
+            _dump_best(exp, run, score, self.save_path, self.writer.dump)
+
+
+def _from_cache(exp, run, save_path) -> Optional[float]:
+    if exp.cache is None:
+        return None
+
+    return exp.cache.get(run, exp.num_valid_trials, exp.higher_is_better, save_path / exp.name / run.name)
 
 
 def _run_seq(exp, tr_set, vl_set, save_path):
+    results = _Results(exp, save_path)
 
-    HIGH_ = 1e4
-    LOW_ = -HIGH_
-    best_score = LOW_ if exp.higher_is_better else HIGH_
+    try:
+        for run in iter(exp.search.ask, None):
+            score = _from_cache(exp, run, save_path)
+            if score is not None:
+                results.add(run, score, cached=True)
+                continue
 
-    is_better = lambda a, b: a > b if exp.higher_is_better else a < b  # noqa: E731
+            score = exp._fire(run, exp.evaluate_fn, tr_set, vl_set, save_path / exp.name, exp.num_valid_trials,
+                              exp.higher_is_better, exp.scheduler, keep_best=exp.keep_top_k > 0)
+            results.add(run, score)
 
-    for run in exp.runs:
-        score = exp._fire(run, exp.evaluate_fn, tr_set, vl_set, save_path / exp.name, exp.num_valid_trials, exp.higher_is_better)
-        if is_better(score, best_score):
-            best_score, best_run = score, run
+    except KeyboardInterrupt:
+        print('Received a Keyboard Interrupt, saving current state...')
+        _save_and_interrupt(exp, {}, results.scores, save_path)
+        raise KeyboardInterrupt("Experiment interrupted.")
 
-    return best_score, best_run
+    finally:
+        results.writer.close()
 
+    _report_throughput(exp, results, save_path)
 
-def _run_par(exp, tr_set, vl_set, save_path):
-    import ray
-    remotes = {}
+    return results.best_score, results.best_run
 
-    for run in exp.runs:
-        id_ = exp._fire.remote(run, exp.evaluate_fn, tr_set, vl_set, save_path / exp.name, exp.num_valid_trials, exp.higher_is_better)
-        remotes[id_] = run
 
-    HIGH_ = 1e4
-    LOW_ = -HIGH_
+def _resumed_score(exp, run) -> Optional[float]:
+    if isinstance(exp._fire, _Resume) and exp._fire.r_status.get(run.name, False):
+        return exp._fire.r_scores[run.name]
+
+    return None
 
-    best_score = LOW_ if exp.higher_is_better else HIGH_
-    is_better = lambda a, b: a > b if exp.higher_is_better else a < b  # noqa: E731
+
+def _run_par(exp, tr_set, vl_set, save_path):
+    executor = exp.executor
+    futures, task_bytes = {}, []
+    results = _Results(exp, save_path)
+    tr_ref, vl_ref, fn_ref = _share(exp, tr_set, vl_set, exp.evaluate_fn)
+    scheduler = executor.share(exp.scheduler) if exp.scheduler is not None else None
+    max_in_flight = exp.max_in_flight or exp.slots
+
+    # with parallel trials each (run, trial) pair is a task of its own, a run is
+    # scored once all of its trials are in; otherwise a task is a whole run
+    num_trials = exp.num_valid_trials if exp.parallel_trials else None
+    resume = isinstance(exp._fire, _Resume)
+    queue, trials = [], {}
 
     try:
-        for id_, run_ in remotes.items():
-            score = ray.get(id_)
-            if is_better(score, best_score):
-                best_score, best_run = score, run_
+        while True:
+            # keep at most max_in_flight tasks submitted at any time, runs are drawn
+            # lazily so that adaptive searches see every result collected so far
+            while len(futures) < max_in_flight:
+                if not queue:
+                    run = exp.search.ask()
+                    if run is None:
+                        break
+
+                    score = _from_cache(exp, run, save_path)
+                    if score is not None:
+                        results.add(run, score, cached=True)
+                        continue
 
-            ray.cancel(id_, force=True)
+                    if num_trials is None:
+                        queue.append((run, None))
+                        continue
+
+                    score = _resumed_score(exp, run)
+                    if score is not None:
+                        results.add(run, score)
+                        continue
+
+                    trials[run.name] = []
+                    queue.extend((run, trial) for trial in range(num_trials))
+
+                run, trial = queue.pop(0)
+                if trial is None:
+                    fn, args = exp._fire, (run, fn_ref, tr_ref, vl_ref, save_path / exp.name, exp.num_valid_trials,
+                                           exp.higher_is_better, scheduler)
+                else:
+                    fn, args = run_valid_trial, (run, fn_ref, tr_ref, vl_ref, save_path / exp.name, trial,
+                                                 exp.higher_is_better, scheduler, resume)
+
+                # only the first trial shares its seed with a test trial
+                keep_best = exp.keep_top_k > 0 and not trial
+                task_bytes.append(executor.sizeof(*args, keep_best=keep_best))
+                futures[executor.submit(fn, *args, keep_best=keep_best)] = (run, trial)
+
+            if not futures:
+                break
+
+            for future in executor.wait(list(futures.keys())):
+                run_, trial_ = futures.pop(future)
+
+                if trial_ is None:
+                    results.add(run_, executor.result(future))
+                    continue
+
+                trials[run_.name].append(executor.result(future))
+                if len(trials[run_.name]) == num_trials:
+                    results.add(run_, merge_valid_trials(run_, save_path / exp.name, trials.pop(run_.name)))
 
     except KeyboardInterrupt:
         print('Received a Keyboard Interrupt, saving current state...')
-        completed, uncompleted = ray.wait(list(remotes.keys()), timeout=1)
-        _save_and_interrupt(exp, remotes, completed, uncompleted, save_path)
+        if scheduler is not None:
+            exp.scheduler = scheduler.get()
+        _save_and_interrupt(exp, futures, results.scores, save_path)
         raise KeyboardInterrupt("Experiment interrupted.")
 
-    return best_score, best_run
+    finally:
+        results.writer.close()
+
+    if scheduler is not None:
+        exp.scheduler = scheduler.get()
+
+    _report_transfer(exp, task_bytes, save_path, 'validation')
+    _report_throughput(exp, results, save_path)
 
+    return results.best_score, results.best_run
 
-def _save_and_interrupt(exp, remotes, completed_runs, uncompleted_runs, save_path):
-    import ray
 
-    for id in uncompleted_runs:
-        ray.cancel(id, force=True)
+def _save_and_interrupt(exp, futures, scores, save_path):
+    if exp.executor is not None:
+        # interrupted runs pick up again from their last checkpoint
+        for future in futures:
+            exp.executor.cancel(future)
+
+        exp.executor.shutdown(wait=False)
+        exp.executor = None
 
     r_status = {}
     r_scores = {}
 
-    for id in remotes:
-        run_name = remotes[id].name
-        r_status[run_name] = id in completed_runs
-        r_scores[run_name] = ray.get(id) if id in completed_runs else NOT_DEFINED
+    for run in exp.runs:
+        r_status[run.name] = run.name in scores
+        r_scores[run.name] = scores.get(run.name, NOT_DEFINED)
 
     dump(r_status, save_path / exp.name / RESUME_EXP_DIR / 'runs.status.json')
     dump(r_scores, save_path / exp.name / RESUME_EXP_DIR / 'runs.scores.json')
@@ -92,9 +263,18 @@ def _save_and_interrupt(exp, remotes, completed_runs, uncompleted_runs, save_pat
     dump(exp, save_path / exp.name / RESUME_EXP_DIR / 'experiment.status.pkl')
 
 
+def _follow_direction(owner, higher_is_better: bool):
+    # the experiment owns the direction, its scheduler and search follow it
+    if getattr(owner, 'higher_is_better', None) is None:
+        owner.higher_is_better = higher_is_better
+
+    assert owner.higher_is_better == higher_is_better, \
+        f"{type(owner).__name__} has higher_is_better={owner.higher_is_better}, the experiment {higher_is_better}"
+
+
 class Experiment:
     def __init__(self,
-                 runs: List[Run],
+                 runs: Union[List[Run], Search],
                  evaluate_fn: Callable,
                  save_path: Path,
                  name: str = '',
@@ -103,9 +283,22 @@ class Experiment:
                  num_valid_trials: int = 1,
                  num_test_trials: int = 5,
                  nw: int = 1,
-                 higher_is_better: bool = True):
-
-        self.runs = runs
+                 higher_is_better: bool = True,
+                 max_in_flight: Optional[int] = None,
+                 scheduler: Optional[ASHA] = None,
+                 backend: str = 'ray',
+                 cache: Optional[ResultCache] = None,
+                 index: Optional[ResultsIndex] = None,
+                 async_io: bool = False,
+                 parallel_trials: bool = False,
+                 keep_top_k: int = 0,
+                 threads_per_run: int = 1,
+                 runs_per_worker: int = 1,
+                 pin_cores: bool = False):
+
+        self.search = runs if isinstance(runs, Search) else Search(runs)
+        if hasattr(self.search, 'higher_is_better'):
+            _follow_direction(self.search, higher_is_better)
         self.evaluate_fn = evaluate_fn
         self.num_cpus = num_cpus
         self.num_gpus = num_gpus
@@ -113,21 +306,25 @@ class Experiment:
         self.num_test_trials = num_test_trials
         self.nw = nw
         self.higher_is_better = higher_is_better
+        self.max_in_flight = max_in_flight
+        self.scheduler = scheduler
+        if scheduler is not None:
+            _follow_direction(scheduler, higher_is_better)
+        self.backend = backend
+        self.cache = cache
+        self.index = index
+        self.async_io = async_io
+        self.parallel_trials = parallel_trials
+        self.keep_top_k = keep_top_k
+        self.checkpoints: Optional[TopKCheckpoints] = None
+        self.threads_per_run = threads_per_run
+        self.runs_per_worker = runs_per_worker
+        self.pin_cores = pin_cores
 
         self.sequential = num_cpus == 1
-        if not self.sequential:
-            _init_ray(num_cpus, num_gpus, nw)
-
-            from ray import remote
-
-            @remote(num_cpus=1, num_gpus=1/nw if num_gpus > 0 else 0)
-            def run_valid(*args, **kwargs) -> float:
-                return validate_run(*args, **kwargs)
-
-            self._fire = run_valid
-
-        else:
-            self._fire = validate_run
+        self.executor = None if self.sequential else make_executor(backend, num_cpus, num_gpus, nw, threads_per_run,
+                                                                   runs_per_worker, pin_cores)
+        self._fire = validate_run
 
         self.name = name + '-' + get_name()
 
@@ -135,22 +332,23 @@ class Experiment:
             print(f"[warning]: experiment {self.name} already existing.")
             self.name += "-new"
 
+    @property
+    def runs(self) -> List[Run]:
+        return self.search.runs
+
+    @property
+    def slots(self) -> int:
+        return 1 if self.sequential else num_slots(self.num_cpus, self.threads_per_run, self.runs_per_worker)
+
 
 def validate(experiment: Experiment,
              tr_set: BaseLoader,
              vl_set: BaseLoader,
              save_path: Path) -> Run:
 
-    if len(experiment.runs) == 1:
-        best_run = experiment.runs[0]
-        dump({
-            'meta': {
-                'name': best_run.name,
-                'vl_score': NOT_DEFINED,
-                'date': get_date()
-            },
-            'config': best_run.config,
-        }, save_path / experiment.name / 'best_run.json')
+    if experiment.search.num_runs == 1:
+        best_run = experiment.search.ask()
+        _dump_best(experiment, best_run, NOT_DEFINED, save_path)
         return best_run
 
     if experiment.sequential:
@@ -164,14 +362,7 @@ def validate(experiment: Experiment,
                                         vl_set,
                                         save_path)
 
-    dump({
-        'meta': {
-            'name': best_run.name,
-            'vl_score': best_score,
-            'date': get_date()
-        },
-        'config': best_run.config,
-    }, save_path / experiment.name / 'best_run.json')
+    _dump_best(experiment, best_run, best_score, save_path)
 
     return best_run
 
@@ -187,6 +378,9 @@ def run_exp(experiment: Experiment,
                         vl_set=vl_set,
                         save_path=save_path)
 
+    # the best run is always among the kept ones, unless it was cached, cut short or never validated
+    checkpoint = experiment.checkpoints.get(best_run.name) if experiment.checkpoints is not None else None
+
     if experiment.sequential:
         res = run_test(run=best_run,
                        evaluate_fn=experiment.evaluate_fn,
@@ -195,46 +389,53 @@ def run_exp(experiment: Experiment,
                        ts_set=ts_set,
                        num_trials=experiment.num_test_trials,
                        higher_is_better=experiment.higher_is_better,
-                       save_path=save_path / experiment.name / 'trials')
-
-        res['mean_score'] = mean(res['ts_scores'])
-        res['std_score'] = stdev(res['ts_scores']) if experiment.num_test_trials > 1 else 0
+                       save_path=save_path / experiment.name / 'trials',
+                       checkpoint=checkpoint)
 
     else:
-        import ray
-
-        @ray.remote(num_cpus=1, num_gpus=1/experiment.nw)
-        def test(*args, **kwargs) -> float:
-            return run_test(*args, **kwargs)
-
-        remotes = []
-        for i in range(experiment.num_test_trials):
-            id_ = test.remote(run=best_run,
-                              evaluate_fn=experiment.evaluate_fn,
-                              tr_set=tr_set,
-                              vl_set=vl_set,
-                              ts_set=ts_set,
-                              num_trials=1,
-                              higher_is_better=experiment.higher_is_better,
-                              save_path=save_path / experiment.name / f'trial_{i}')
-            remotes.append(id_)
-
-        res = {}
-        for id_ in remotes:
-            res_trial = ray.get(id_)
-            if not res:
-                res = res_trial
-            else:
-                for key in res.keys():
-                    if not isinstance(res[key], list):
-                        continue
+        executor = experiment.executor
+        fn_ref, tr_ref, vl_ref, ts_ref = _share(experiment, experiment.evaluate_fn, tr_set, vl_set, ts_set)
+
+        # test trials are independent tasks, merged the same way run_test merges them
+        futures, task_bytes = [], []
+        for trial in range(experiment.num_test_trials):
+            kwargs = dict(run=best_run,
+                          evaluate_fn=fn_ref,
+                          tr_set=tr_ref,
+                          vl_set=vl_ref,
+                          ts_set=ts_ref,
+                          trial=trial,
+                          higher_is_better=experiment.higher_is_better,
+                          save_path=save_path / experiment.name / 'trials',
+                          checkpoint=checkpoint if trial == 0 else None)
+            task_bytes.append(executor.sizeof(**kwargs))
+            futures.append(executor.submit(run_test_trial, **kwargs))
+
+        res = merge_test_trials([executor.result(future) for future in futures])
+
+        _report_transfer(experiment, task_bytes, save_path, 'test')
+        executor.shutdown()
+
+    # metric files are referenced relative to the experiment folder
+    res['metrics'] = [str(Path(path).relative_to(save_path / experiment.name)) for path in res['metrics']]
+    dump(res, save_path / experiment.name / 'test_info.json')
 
-                    res[key].extend(res_trial[key])
+    if experiment.index is not None:
+        experiment.index.add_test(save_path / experiment.name)
 
-        res['mean_score'] = mean(res['ts_scores'])
-        res['std_score'] = stdev(res['ts_scores']) if experiment.num_test_trials > 1 else 0
 
-    dump(res, save_path / experiment.name / 'test_info.json')
+class _Resume:
+    # stands in for run_valid: finished runs return their score, the others resume
+
+    def __init__(self, r_status, r_scores):
+        self.r_status = r_status
+        self.r_scores = r_scores
+
+    def __call__(self, run, *args, **kwargs) -> float:
+        if self.r_status.get(run.name, False):
+            return self.r_scores[run.name]
+
+        return validate_run(run, *args, resume=True, **kwargs)
 
 
 def resume_exp(experiment_path: Path) -> Experiment:
@@ -243,21 +444,11 @@ def resume_exp(experiment_path: Path) -> Experiment:
     exp = load(experiment_path / RESUME_EXP_DIR / 'experiment.status.pkl')
 
     if not exp.sequential:
-        _init_ray(exp.num_cpus, exp.num_gpus, exp.nw)
-
-        from ray import remote
-
-        @remote(num_cpus=1, num_gpus=1/exp.nw if exp.num_gpus > 0 else 0)
-        def run_valid(run, *args, **kwargs) -> float:
-            if r_status[run.name]:
-                return r_scores[run.name]
+        exp.executor = make_executor(exp.backend, exp.num_cpus, exp.num_gpus, exp.nw, exp.threads_per_run,
+                                     exp.runs_per_worker, exp.pin_cores)
 
-            return validate_run(run, *args, **kwargs)
-
-        exp._fire = run_valid
-    else:
-        raise NotImplementedError("Resume is not yet implemented for sequential experiments.")
-        exp._fire = validate_run
+    exp._fire = _Resume(r_status, r_scores)
+    exp.search.rewind()
 
     from shutil import rmtree
     rmtree(experiment_path / RESUME_EXP_DIR)
@@ -1,9 +1,39 @@
-def random_search(space, num_samples):
+from .samplers import Sampler, sample_space
+from typing import Optional
+
+
+def random_search(space, num_samples, seed: Optional[int] = None, method: str = 'random', as_columns: bool = False):
+    # Sampler entries are drawn in one vectorized pass, plain callables one value at a time
+    vectorized = {name: sample for name, sample in space.items() if isinstance(sample, Sampler)}
+
+    if as_columns and len(vectorized) < len(space):
+        raise ValueError("as_columns requires every entry of the space to be a Sampler")
+
+    if vectorized:
+        if seed is None:
+            import random as rng
+            seed = rng.getrandbits(64)
+
+        columns = sample_space(vectorized, num_samples, seed, method)
+
+        # one array per parameter, without building a dict per config
+        if as_columns:
+            return columns
+
+        columns = {name: column.tolist() for name, column in columns.items()}
+
+    if not space:
+        return [{} for _ in range(num_samples)]
+
+    if len(vectorized) == len(space):
+        names = list(space)
+        return [dict(zip(names, values)) for values in zip(*(columns[name] for name in names))]
+
     configs = []
-    for _ in range(num_samples):
+    for i in range(num_samples):
         c_ = {}
         for param_name, sample in space.items():
-            c_[param_name] = sample()
+            c_[param_name] = columns[param_name][i] if param_name in vectorized else sample()
 
         configs.append(c_)
 
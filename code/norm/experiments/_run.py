@@ -1,9 +1,14 @@
+from __future__ import annotations
+
 from ._random_search import random_search
-from clrs import Model
 from dataclasses import dataclass
 from functools import partial
-from torch.optim import Optimizer
-from typing import Any, Callable, Dict
+from typing import TYPE_CHECKING, Any, Callable, Dict
+
+if TYPE_CHECKING:
+    # only needed for annotations, importing them pulls in the whole model stack
+    from clrs import Model
+    from torch.optim import Optimizer
 
 
 @dataclass(init=True, eq=True, frozen=True)
@@ -18,6 +23,25 @@ class Run:
     log_every: int
     train_steps: int
     verbose: bool
+    checkpoint_every: int = 0
+    trace: bool = False
+
+
+def _make_run(i: int,
+              m_conf: Dict[str, Any],
+              o_conf: Dict[str, Any],
+              model_fn: Callable[[Any], Model],
+              optim_fn: Callable[[Any], Optimizer],
+              **kwargs) -> Run:
+
+    model_fn = partial(model_fn,
+                       **m_conf,
+                       optim_fn=partial(optim_fn, **o_conf))
+
+    return Run(name=f'run_{i}',
+               config={**m_conf, **o_conf},
+               model_fn=model_fn,
+               **kwargs)
 
 
 def init_runs(num_runs: int,
@@ -30,7 +54,10 @@ def init_runs(num_runs: int,
               early_stop_patience: int,
               log_every: int,
               train_steps: int,
-              verbose: bool):
+              verbose: bool,
+              checkpoint_every: int = 0,
+              sampling: str = 'random',
+              trace: bool = False):
 
     assert 'model' in hp_space, "Model's hyperparameters are missing"
     assert 'optim' in hp_space, "Optimiser's hyperparameters are missing"
@@ -38,28 +65,32 @@ def init_runs(num_runs: int,
     model_configs = hp_space['model']
     optim_configs = hp_space['optim']
 
-    search = partial(random_search, num_samples=num_runs)
+    # both spaces are drawn as one design, separate quasi-random designs would pair up their points;
+    # optimiser parameters named as a model one are told apart by a prefix
+    keys = {name: f'optim.{name}' if name in model_configs else name for name in optim_configs}
+    configs = random_search({**model_configs, **{keys[name]: sample for name, sample in optim_configs.items()}},
+                            num_samples=num_runs, seed=seed, method=sampling)
     runs = list()
 
     # TODO: create list of seeds, one for each run.
     seeds = [seed + i for i in range(num_runs)]
 
-    for i, (m_conf, o_conf) in enumerate(zip(search(model_configs), search(optim_configs))):
-
-        model_fn = partial(model_fn,
-                           **m_conf,
-                           optim_fn=partial(optim_fn, **o_conf))
-
-        run_ = Run(name=f'run_{i}',
-                   seed=seeds[i],
-                   config={**m_conf, **o_conf},
-                   model_fn=model_fn,
-                   batch_size=batch_size,
-                   early_stop=early_stop,
-                   early_stop_patience=early_stop_patience,
-                   log_every=log_every,
-                   train_steps=train_steps,
-                   verbose=verbose)
+    for i, config in enumerate(configs):
+        m_conf = {name: config[name] for name in model_configs}
+        o_conf = {name: config[keys[name]] for name in optim_configs}
+
+        run_ = _make_run(i, m_conf, o_conf,
+                         model_fn=model_fn,
+                         optim_fn=optim_fn,
+                         seed=seeds[i],
+                         batch_size=batch_size,
+                         early_stop=early_stop,
+                         early_stop_patience=early_stop_patience,
+                         log_every=log_every,
+                         train_steps=train_steps,
+                         verbose=verbose,
+                         checkpoint_every=checkpoint_every,
+                         trace=trace)
 
         runs.append(run_)
 
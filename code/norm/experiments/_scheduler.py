@@ -0,0 +1,51 @@
+from typing import Dict, Hashable, List, Optional
+
+
+class ASHA:
+
+    def __init__(self,
+                 min_steps: int,
+                 max_steps: int,
+                 reduction_factor: int = 3,
+                 higher_is_better: Optional[bool] = None):
+
+        assert min_steps > 0, "The first rung must be after at least one step"
+        assert reduction_factor > 1, "Reduction factor must be greater than 1"
+
+        self.reduction_factor = reduction_factor
+        # None follows the experiment's direction, on its own it means higher is better
+        self.higher_is_better = higher_is_better
+
+        # rungs at min_steps * eta^k, the full budget is not a rung
+        self.rungs: List[int] = []
+        rung = min_steps
+        while rung < max_steps:
+            self.rungs.append(rung)
+            rung *= reduction_factor
+
+        self._scores: Dict[int, List[float]] = {rung: [] for rung in self.rungs}
+        self._next_rung: Dict[Hashable, int] = {}
+
+    def on_result(self, key: Hashable, step: int, score: float) -> bool:
+        # False means `key` fell behind at one of the rungs it just crossed
+        idx = self._next_rung.get(key, 0)
+
+        while idx < len(self.rungs) and step >= self.rungs[idx]:
+            rung = self.rungs[idx]
+            idx += 1
+            self._next_rung[key] = idx
+
+            if not self._promote(rung, score):
+                return False
+
+        return True
+
+    def _promote(self, rung: int, score: float) -> bool:
+        from numpy import quantile
+
+        score = -score if self.higher_is_better is False else score
+        self._scores[rung].append(score)
+
+        # only the top 1/eta of the runs seen so far at this rung carry on
+        cutoff = quantile(self._scores[rung], 1 - 1 / self.reduction_factor)
+        return score >= cutoff
@@ -0,0 +1,205 @@
+from ._run import Run, _make_run
+from .samplers import Sampler
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+_MIN_BANDWIDTH = 0.1
+_MAX_BANDWIDTH = 0.5
+
+
+class Search:
+    # hands out runs one at a time and hears back their scores
+
+    def __init__(self, runs: Optional[List[Run]] = None):
+        self.runs = list(runs) if runs is not None else []
+        self.num_runs = len(self.runs)
+        self._next = 0
+        self._scores: Dict[str, float] = {}
+
+    def ask(self) -> Optional[Run]:
+        if self._next < len(self.runs):
+            run = self.runs[self._next]
+        else:
+            run = self._propose()
+            if run is None:
+                return None
+
+            self.runs.append(run)
+
+        self._next += 1
+        return run
+
+    def tell(self, run: Run, score: float):
+        # resumed experiments report finished runs a second time
+        if run.name in self._scores:
+            return
+
+        self._scores[run.name] = score
+        self._observe(run, score)
+
+    def rewind(self):
+        self._next = 0
+
+    def _propose(self) -> Optional[Run]:
+        return None
+
+    def _observe(self, run: Run, score: float):
+        pass
+
+
+def _log_parzen(x, centers, bandwidth):
+    import numpy as np
+
+    # mixture of one gaussian per observation and a uniform prior on [0, 1]
+    z = (x[:, None] - centers[None, :]) / bandwidth
+    kernels = np.exp(-0.5 * z ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+    return np.log((1 + kernels.sum(axis=1)) / (len(centers) + 1))
+
+
+def _bandwidth(centers):
+    import numpy as np
+
+    # Scott's rule
+    std = centers.std() if len(centers) > 1 else _MAX_BANDWIDTH
+    return float(np.clip(1.06 * std * len(centers) ** (-1 / 5), _MIN_BANDWIDTH, _MAX_BANDWIDTH))
+
+
+class TPESearch(Search):
+
+    def __init__(self,
+                 num_runs: int,
+                 model_space: Dict[str, Sampler],
+                 optim_space: Dict[str, Sampler],
+                 make_run: Callable[[int, Dict[str, Any], Dict[str, Any]], Run],
+                 seed: int,
+                 higher_is_better: Optional[bool] = None,
+                 num_startup: int = 10,
+                 gamma: float = 0.25,
+                 num_candidates: int = 24):
+
+        import numpy as np
+
+        for name, sampler in {**model_space, **optim_space}.items():
+            assert isinstance(sampler, Sampler), f"TPE needs a Sampler for '{name}'"
+
+        super().__init__()
+        self.num_runs = num_runs
+        self.model_space = model_space
+        self.optim_space = optim_space
+        self.make_run = make_run
+        # None follows the experiment's direction, on its own it means higher is better
+        self.higher_is_better = higher_is_better
+        self.num_startup = num_startup
+        self.gamma = gamma
+        self.num_candidates = num_candidates
+
+        self._names = list(model_space) + list(optim_space)
+        self._rng = np.random.default_rng(seed)
+        self._points: Dict[str, Any] = {}
+        self._observed: List[Any] = []
+        self._losses: List[float] = []
+
+    def _propose(self) -> Optional[Run]:
+        import numpy as np
+
+        i = len(self.runs)
+        if i >= self.num_runs:
+            return None
+
+        if len(self._observed) < self.num_startup:
+            point = self._rng.random(len(self._names))
+        else:
+            point = self._suggest()
+
+        values = {name: self._space(name).ppf(point[d:d + 1]).tolist()[0] for d, name in enumerate(self._names)}
+        run = self.make_run(i,
+                            {name: values[name] for name in self.model_space},
+                            {name: values[name] for name in self.optim_space})
+
+        self._points[run.name] = np.asarray(point)
+        return run
+
+    def _observe(self, run: Run, score: float):
+        if run.name not in self._points:
+            return
+
+        self._observed.append(self._points[run.name])
+        self._losses.append(score if self.higher_is_better is False else -score)
+
+    def _space(self, name: str) -> Sampler:
+        return self.model_space[name] if name in self.model_space else self.optim_space[name]
+
+    def _suggest(self):
+        import numpy as np
+
+        observed = np.stack(self._observed)
+        order = np.argsort(self._losses)
+        num_good = max(1, int(np.ceil(self.gamma * len(order))))
+        good, bad = observed[order[:num_good]], observed[order[num_good:]]
+
+        candidates = np.empty((self.num_candidates, len(self._names)))
+        ratio = np.zeros(self.num_candidates)
+
+        # dimensions are modelled independently, candidates are drawn from l(x)
+        for d in range(len(self._names)):
+            centers, bw = good[:, d], _bandwidth(good[:, d])
+            component = self._rng.integers(0, len(centers) + 1, self.num_candidates)
+            from_prior = component == len(centers)
+
+            x = centers[np.minimum(component, len(centers) - 1)] + bw * self._rng.standard_normal(self.num_candidates)
+            x[from_prior] = self._rng.random(from_prior.sum())
+            # reflecting at the borders keeps the kernels from piling mass on 0 and 1
+            x = 1 - np.abs(1 - np.abs(x))
+            candidates[:, d] = x = np.clip(x, 0, 1 - 1e-12)
+
+            ratio += _log_parzen(x, centers, bw)
+            if len(bad):
+                ratio -= _log_parzen(x, bad[:, d], _bandwidth(bad[:, d]))
+
+        return candidates[np.argmax(ratio)]
+
+
+def _seeded_run(i: int, m_conf: Dict[str, Any], o_conf: Dict[str, Any], seed: int, **kwargs) -> Run:
+    # same seeding as init_runs
+    return _make_run(i, m_conf, o_conf, seed=seed + i, **kwargs)
+
+
+def init_search(num_runs: int,
+                hp_space: Dict,
+                model_fn: Callable,
+                optim_fn: Callable,
+                seed: int,
+                batch_size: int,
+                early_stop: bool,
+                early_stop_patience: int,
+                log_every: int,
+                train_steps: int,
+                verbose: bool,
+                checkpoint_every: int = 0,
+                higher_is_better: Optional[bool] = None,
+                num_startup: int = 10,
+                trace: bool = False) -> TPESearch:
+
+    assert 'model' in hp_space, "Model's hyperparameters are missing"
+    assert 'optim' in hp_space, "Optimiser's hyperparameters are missing"
+
+    make_run = partial(_seeded_run,
+                       seed=seed,
+                       model_fn=model_fn,
+                       optim_fn=optim_fn,
+                       batch_size=batch_size,
+                       early_stop=early_stop,
+                       early_stop_patience=early_stop_patience,
+                       log_every=log_every,
+                       train_steps=train_steps,
+                       verbose=verbose,
+                       checkpoint_every=checkpoint_every,
+                       trace=trace)
+
+    return TPESearch(num_runs,
+                     hp_space['model'],
+                     hp_space['optim'],
+                     make_run=make_run,
+                     seed=seed,
+                     higher_is_better=higher_is_better,
+                     num_startup=num_startup)
@@ -1,81 +1,144 @@
 from ._run import Run
+from ._validation import _dump_profile, log, trial_seed
+from norm import set_seed
 from norm._typings import BaseLoader
-from norm.io import dump
-from typing import Callable
+from norm.io import CheckpointWriter, MetricRecorder
+from norm.performance import Profiler
+from typing import Callable, Dict, List, Optional
 from pathlib import Path
-from rich.pretty import pprint as log
 
 
-def run_test(run: Run,
-             evaluate_fn: Callable,
-             tr_set: BaseLoader,
-             vl_set: BaseLoader,
-             ts_set: BaseLoader,
-             save_path: Path,
-             num_trials: int = 5,
-             name: str = '',
-             higher_is_better: bool = True):
+_STREAMS = ('tr_scores', 'vl_scores', 'loss')
 
+
+def run_test_trial(run: Run,
+                   evaluate_fn: Callable,
+                   tr_set: BaseLoader,
+                   vl_set: BaseLoader,
+                   ts_set: BaseLoader,
+                   save_path: Path,
+                   trial: int = 0,
+                   higher_is_better: bool = True,
+                   checkpoint: Optional[Path] = None) -> Dict:
+
+    set_seed(trial_seed(run, trial))
     is_better = lambda a, b: a > b if higher_is_better else a < b  # noqa: E731
 
     LOW_ = 0.0
     HIGH_ = 1e4
 
+    profiler = Profiler(trace=run.trace)
+    section = profiler.section
+
     def closure():
         model = run.model_fn()
         best = LOW_ if higher_is_better else HIGH_
-        losses, tr_scores, vl_scores = [], [], []
+        metrics = MetricRecorder()
 
-        for step in range(1, run.train_steps+1):
-            feedback = tr_set.next(run.batch_size)
-            loss = model.feedback(feedback)
-            losses.append(loss)
-
-            if step % run.log_every == 0:
-                tr_stats = evaluate_fn(model, feedback, extras={'step': step, 'loss': loss})
-                vl_stats = evaluate_fn(model, vl_set.next(), extras={'step': step}, verbose=run.verbose)
-
-                tr_scores.append(tr_stats)
-                vl_scores.append(vl_stats)
-
-                log(dict(
-                    **{
-                        f'tr_{key}': item
-                        for key, item in tr_stats.items()
-                    },
-                    **{
-                        f'vl_{key}': item
-                        for key, item in vl_stats.items()
-                    }
-                ))
-
-                dump(tr_scores, save_path / 'tr_scores.pkl')
-                dump(vl_scores, save_path / 'vl_scores.pkl')
-                dump(loss, save_path / 'loss.pkl')
-
-                if is_better(vl_stats['score'], best):
-                    best = vl_stats['score']
-                    dump(model.net_.state_dict(), save_path / f'model_{trial}.pth')
-
-        return losses, tr_scores, vl_scores
-
-    losses, tr_scores, vl_scores, ts_stats, ts_scores = [], [], [], [], []
-
-    for trial in range(num_trials):
-        loss, tr_score, vl_score = closure()
-        losses.append(loss)
-        tr_scores.append(tr_score)
-        vl_scores.append(vl_score)
+        # score histories are streamed, one record per log step, so that a run can be tailed while it
+        # goes and inspected after a crash; metrics_{trial}.npz is the canonical store once it is saved
+        for stream in _STREAMS:
+            (save_path / f'{stream}_{trial}.jsonl').unlink(missing_ok=True)
 
+        for step in range(1, run.train_steps+1):
+            with section('step'):
+                with section('next'):
+                    feedback = tr_set.next(run.batch_size)
+
+                with section('feedback'):
+                    loss = model.feedback(feedback)
+                    metrics.add('loss', loss)
+
+                if step % run.log_every == 0:
+                    with section('evaluate'):
+                        tr_stats = evaluate_fn(model, feedback, extras={'step': step, 'loss': loss})
+                        vl_stats = evaluate_fn(model, vl_set.next(), extras={'step': step}, verbose=run.verbose)
+
+                    with section('log'):
+                        metrics.update(tr_stats, prefix='tr_')
+                        metrics.update(vl_stats, prefix='vl_')
+
+                        log(dict(
+                            **{
+                                f'tr_{key}': item
+                                for key, item in tr_stats.items()
+                            },
+                            **{
+                                f'vl_{key}': item
+                                for key, item in vl_stats.items()
+                            }
+                        ))
+
+                        writer.append(tr_stats, save_path / f'tr_scores_{trial}.jsonl')
+                        writer.append(vl_stats, save_path / f'vl_scores_{trial}.jsonl')
+                        writer.append({'step': step, 'loss': loss}, save_path / f'loss_{trial}.jsonl')
+
+                    if is_better(vl_stats['score'], best):
+                        best = vl_stats['score']
+                        with section('checkpoint'):
+                            writer.submit(model.net_.state_dict(), save_path / f'model_{trial}.pth')
+
+        return metrics
+
+    if checkpoint is not None:
+        # validation already trained this seed, its best model and curves stand in for the training
+        metrics_path = checkpoint.with_name(f'metrics_{trial}.npz')
+    else:
+        checkpoint, metrics_path = save_path / f'model_{trial}.pth', save_path / f'metrics_{trial}.npz'
+
+        with CheckpointWriter() as writer:
+            with section('trial'):
+                metrics = closure()
+
+            with section('dump'):
+                metrics.save(metrics_path)
+
+                # the best checkpoint and the last stream records may still be in flight
+                writer.flush()
+
+                # the streams only duplicate the saved columns from here on
+                for stream in _STREAMS:
+                    (save_path / f'{stream}_{trial}.jsonl').unlink(missing_ok=True)
+
+    with section('test'):
         model = run.model_fn()
-        model.restore_model(save_path / f'model_{trial}.pth', 'cpu')
-        ts_stats.append(evaluate_fn(model, ts_set.next()))
-        ts_scores.append(ts_stats[-1]['score'])
+        model.restore_model(checkpoint, 'cpu')
+        ts_stats = evaluate_fn(model, ts_set.next())
+
+    _dump_profile(profiler, run, save_path, trial)
+
+    return dict(trial=trial,
+                metrics=str(metrics_path),
+                ts_stats=ts_stats)
+
+
+def merge_test_trials(results: List[Dict]) -> Dict:
+    import numpy as np
+
+    results = sorted(results, key=lambda result: result['trial'])
+    scores = np.array([result['ts_stats']['score'] for result in results], dtype=np.float64)
 
     return dict(
-        loss=losses,
-        num_trials=num_trials,
-        tr_scores=tr_scores,
-        vl_scores=vl_scores,
-        ts_scores=ts_scores,
-        ts_stats=ts_stats)
+        num_trials=len(results),
+        metrics=[result['metrics'] for result in results],
+        ts_scores=scores.tolist(),
+        ts_stats=[result['ts_stats'] for result in results],
+        mean_score=float(scores.mean()),
+        std_score=float(scores.std(ddof=1)) if len(scores) > 1 else 0)
+
+
+def run_test(run: Run,
+             evaluate_fn: Callable,
+             tr_set: BaseLoader,
+             vl_set: BaseLoader,
+             ts_set: BaseLoader,
+             save_path: Path,
+             num_trials: int = 5,
+             name: str = '',
+             higher_is_better: bool = True,
+             checkpoint: Optional[Path] = None) -> Dict:
+
+    # a checkpoint of the validation stage replaces the training of the first trial
+    return merge_test_trials([run_test_trial(run, evaluate_fn, tr_set, vl_set, ts_set, save_path, trial, higher_is_better,
+                                             checkpoint if trial == 0 else None)
+                              for trial in range(num_trials)])
@@ -1,11 +1,17 @@
+from ._checkpoints import best_checkpoint
 from ._run import Run
+from ._scheduler import ASHA
 from norm._typings import BaseLoader
-from norm import set_seed
-from norm.io import dump
+from norm import set_seed, get_rng_state, set_rng_state
+from norm.io import CheckpointWriter, MetricRecorder, dump, load
+from norm.performance import Profiler
 from pathlib import Path
-from rich.pretty import pprint as log
-from statistics import mean, stdev
-from typing import Callable
+from typing import Callable, Dict, List, Optional
+
+
+def log(obj):
+    from rich.pretty import pprint
+    pprint(obj)
 
 
 def _early_stop(loss, patience):
@@ -13,15 +19,71 @@ def _early_stop(loss, patience):
     return isnan(loss) or patience <= 0
 
 
-def run_valid(run: Run,
-              evaluate_fn: Callable,
-              tr_set: BaseLoader,
-              vl_set: BaseLoader,
-              save_path: Path,
-              num_trials: int = 1,
-              higher_is_better: bool = True) -> float:
+def _model_state(model):
+    state = dict(net=model.net_.state_dict())
+
+    if getattr(model, 'optimizer', None) is not None:
+        state['optimizer'] = model.optimizer.state_dict()
+
+    return state
+
+
+def _restore_model_state(model, state):
+    model.net_.load_state_dict(state['net'])
+
+    if 'optimizer' in state:
+        model.optimizer.load_state_dict(state['optimizer'])
+
+
+def _loader_state(loader):
+    state_dict = getattr(loader, 'state_dict', None)
+    return state_dict() if state_dict is not None else None
+
+
+def _restore_loader_state(loader, state):
+    if state is not None:
+        loader.load_state_dict(state)
+
+
+# far apart enough that the trials of one run never reuse the seed of another run
+TRIAL_SEED_STRIDE = 1000003
+
+
+def trial_seed(run: Run, trial: int) -> int:
+    return run.seed + trial * TRIAL_SEED_STRIDE
 
-    set_seed(run.seed)
+
+def _dump_profile(profiler, run, path, trial):
+    dump(profiler.stats(), path / f'profile_{trial}.json')
+
+    if run.trace:
+        profiler.export_chrome_trace(path / f'trace_{trial}.json')
+
+
+def run_valid_trial(run: Run,
+                    evaluate_fn: Callable,
+                    tr_set: BaseLoader,
+                    vl_set: BaseLoader,
+                    save_path: Path,
+                    trial: int = 0,
+                    higher_is_better: bool = True,
+                    scheduler: Optional[ASHA] = None,
+                    resume: bool = False,
+                    keep_best: bool = False) -> Dict:
+
+    result_path = save_path / run.name / f'trial_{trial}.json'
+    ckpt_path = save_path / run.name / f'checkpoint_{trial}.pkl'
+    best_path = best_checkpoint(save_path / run.name, trial)
+
+    if resume and result_path.exists():
+        return load(result_path)
+
+    ckpt = load(ckpt_path) if resume and ckpt_path.exists() else None
+
+    # every trial seeds itself, so trials can run in any order and on any worker
+    set_seed(trial_seed(run, trial))
+    profiler = Profiler(trace=run.trace)
+    section = profiler.section
     is_better = lambda a, b: a > b if higher_is_better else a < b  # noqa: E731
     log(run.config)
 
@@ -32,63 +94,152 @@ def run_valid(run: Run,
         model = run.model_fn()
         best_score = LOW_ if higher_is_better else HIGH_
         patience_ = run.early_stop_patience
-        losses, tr_scores, vl_scores = [], [], []
-
-        for step in range(1, run.train_steps + 1):
-            feedback = tr_set.next(run.batch_size)
-            loss = model.feedback(feedback)
-            losses.append(loss)
-
-            if step % run.log_every == 0:
-                tr_stats = evaluate_fn(model, feedback, extras={'step': step, 'loss': loss}, verbose=run.verbose)
-                vl_stats = evaluate_fn(model, vl_set.next(), extras={'step': step}, verbose=run.verbose)
-
-                tr_scores.append(tr_stats)
-                vl_scores.append(vl_stats)
-
-                log(dict(
-                    run_id=run.name,
-                    **{
-                        f'tr_{key}': item
-                        for key, item in tr_stats.items()
-                    },
-                    **{
-                        f'vl_{key}': item
-                        for key, item in vl_stats.items()
-                    }
-                ))
-
-                if is_better(vl_stats['score'], best_score):
-                    best_score = vl_stats['score']
-                else:
-                    patience_ = (patience_ - 1) if run.early_stop else patience_
-
-                if run.early_stop and _early_stop(tr_stats['loss'], patience_):
-                    print("early stopping...")
-                    break
-
-        return losses, tr_scores, vl_scores, best_score
-
-    losses, tr_scores, vl_scores, best_score = [], [], [], []
-
-    for _ in range(num_trials):
-        loss, tr_score, vl_score, score = closure()
-        losses.append(loss)
-        tr_scores.append(tr_score)
-        vl_scores.append(vl_score)
-        best_score.append(score)
+        metrics = MetricRecorder()
+        stopped = False
+        completed = True
+        first_step = 1
+
+        if ckpt is not None:
+            _restore_model_state(model, ckpt['model'])
+            set_rng_state(ckpt['rng'])
+            # without a state, loaders go on from wherever they are and the resumed run sees other batches
+            _restore_loader_state(tr_set, ckpt['loaders']['tr'])
+            _restore_loader_state(vl_set, ckpt['loaders']['vl'])
+            best_score, patience_ = ckpt['best_score'], ckpt['patience']
+            metrics = MetricRecorder.from_dict(ckpt['metrics'], ckpt['metric_objects'])
+            first_step = ckpt['step'] + 1
+
+        for step in range(first_step, run.train_steps + 1):
+            with section('step'):
+                with section('next'):
+                    feedback = tr_set.next(run.batch_size)
+
+                with section('feedback'):
+                    loss = model.feedback(feedback)
+                    metrics.add('loss', loss)
+
+                if step % run.log_every == 0:
+                    with section('evaluate'):
+                        tr_stats = evaluate_fn(model, feedback, extras={'step': step, 'loss': loss}, verbose=run.verbose)
+                        vl_stats = evaluate_fn(model, vl_set.next(), extras={'step': step}, verbose=run.verbose)
+
+                    with section('log'):
+                        metrics.update(tr_stats, prefix='tr_')
+                        metrics.update(vl_stats, prefix='vl_')
+
+                        log(dict(
+                            run_id=run.name,
+                            **{
+                                f'tr_{key}': item
+                                for key, item in tr_stats.items()
+                            },
+                            **{
+                                f'vl_{key}': item
+                                for key, item in vl_stats.items()
+                            }
+                        ))
+
+                    if is_better(vl_stats['score'], best_score):
+                        best_score = vl_stats['score']
+                        if keep_best:
+                            with section('checkpoint'):
+                                writer.submit(model.net_.state_dict(), best_path)
+                    else:
+                        patience_ = (patience_ - 1) if run.early_stop else patience_
+
+                    if run.early_stop and _early_stop(tr_stats['loss'], patience_):
+                        print("early stopping...")
+                        completed = False
+                        break
+
+                    if scheduler is not None and not scheduler.on_result((run.name, trial), step, vl_stats['score']):
+                        print("stopped by scheduler...")
+                        stopped = True
+                        completed = False
+                        break
+
+                if run.checkpoint_every and step % run.checkpoint_every == 0:
+                    with section('checkpoint'):
+                        writer.submit(dict(
+                            trial=trial,
+                            step=step,
+                            model=_model_state(model),
+                            rng=get_rng_state(),
+                            loaders=dict(tr=_loader_state(tr_set), vl=_loader_state(vl_set)),
+                            best_score=best_score,
+                            patience=patience_,
+                            metrics=metrics.as_dict(),
+                            metric_objects=list(metrics.objects),
+                        ), ckpt_path)
+
+        return metrics, best_score, stopped, completed
+
+    with CheckpointWriter() as writer:
+        with section('trial'):
+            metrics, best_score, stopped, completed = closure()
+
+    # the test stage trains for the whole budget, a run cut short would not match it
+    if keep_best and not completed:
+        best_path.unlink(missing_ok=True)
+
+    with section('dump'):
+        metrics.save(save_path / run.name / f'metrics_{trial}.npz')
+        result = dict(trial=trial,
+                      best_score=best_score,
+                      stopped=stopped,
+                      metrics=f'metrics_{trial}.npz')
+        dump(result, result_path)
+
+    _dump_profile(profiler, run, save_path / run.name, trial)
+    ckpt_path.unlink(missing_ok=True)
+
+    return result
+
+
+def merge_valid_trials(run: Run, save_path: Path, results: List[Dict]) -> float:
+    import numpy as np
+
+    results = sorted(results, key=lambda result: result['trial'])
+    scores = np.array([result['best_score'] for result in results], dtype=np.float64)
 
     dump(dict(
         name=run.name,
         seed=run.seed,
-        loss=losses,
-        num_trials=num_trials,
-        tr_scores=tr_scores,
-        vl_scores=vl_scores,
-        mean_score=mean(best_score),
-        std_score=stdev(best_score) if num_trials > 1 else 0,
+        num_trials=len(results),
+        metrics=[result['metrics'] for result in results],
+        mean_score=float(scores.mean()),
+        std_score=float(scores.std(ddof=1)) if len(scores) > 1 else 0,
+        stopped=any(result['stopped'] for result in results),
     ), save_path / run.name / 'train_info.json')
 
     dump(run.config, save_path / run.name / 'parameters.json')
 
-    return mean(best_score)
+    # per-trial summaries are folded into train_info.json
+    for result in results:
+        (save_path / run.name / f'trial_{result["trial"]}.json').unlink(missing_ok=True)
+
+    return float(scores.mean())
+
+
+def run_valid(run: Run,
+              evaluate_fn: Callable,
+              tr_set: BaseLoader,
+              vl_set: BaseLoader,
+              save_path: Path,
+              num_trials: int = 1,
+              higher_is_better: bool = True,
+              scheduler: Optional[ASHA] = None,
+              resume: bool = False,
+              keep_best: bool = False) -> float:
+
+    info_path = save_path / run.name / 'train_info.json'
+
+    if resume and info_path.exists():
+        return load(info_path)['mean_score']
+
+    # only the first trial shares its seed with a test trial
+    results = [run_valid_trial(run, evaluate_fn, tr_set, vl_set, save_path, trial, higher_is_better, scheduler, resume,
+                               keep_best and trial == 0)
+               for trial in range(num_trials)]
+
+    return merge_valid_trials(run, save_path, results)
@@ -1,4 +1,4 @@
-from typing import Sequence
+from typing import Any, Dict, Optional, Sequence
 import random as rng
 
 
@@ -20,3 +20,120 @@ def integer(a: int, b: int):
 
 def loguniform(a: int, b: int):
     return 10 ** rng.uniform(a, b)
+
+
+class Sampler:
+    # maps points of the unit interval to values, so that any unit-cube design can drive it
+
+    def ppf(self, u):
+        raise NotImplementedError()
+
+    def sample(self, gen, num_samples: int):
+        return self.ppf(gen.random(num_samples))
+
+    def __call__(self) -> Any:
+        # scalar draw from the global RNG, as the functional samplers above
+        value = self.ppf(rng.random())
+        return value.item() if hasattr(value, 'item') else value
+
+
+class Uniform(Sampler):
+
+    def __init__(self, a: float, b: float):
+        self.a, self.b = a, b
+
+    def ppf(self, u):
+        import numpy as np
+        return self.a + (self.b - self.a) * np.asarray(u)
+
+
+class LogUniform(Uniform):
+
+    def ppf(self, u):
+        return 10 ** super().ppf(u)
+
+
+class Integer(Sampler):
+
+    def __init__(self, a: int, b: int):
+        self.a, self.b = a, b
+
+    def ppf(self, u):
+        import numpy as np
+        span = self.b - self.a + 1
+        return self.a + np.minimum(np.floor(np.asarray(u) * span), span - 1).astype(np.int64)
+
+
+class Choice(Sampler):
+
+    def __init__(self, seq: Sequence):
+        import numpy as np
+        from numbers import Number
+
+        # anything but plain numbers is kept as is
+        if all(isinstance(item, Number) for item in seq):
+            self.values = np.asarray(seq)
+        else:
+            self.values = np.empty(len(seq), dtype=object)
+            for i, item in enumerate(seq):
+                self.values[i] = item
+
+    def ppf(self, u):
+        import numpy as np
+        k = len(self.values)
+        return self.values[np.minimum(np.floor(np.asarray(u) * k), k - 1).astype(np.int64)]
+
+
+class Normal(Sampler):
+
+    def __init__(self, mu: float, sigma: float):
+        self.mu, self.sigma = mu, sigma
+
+    def ppf(self, u):
+        from scipy.special import ndtri
+        return self.mu + self.sigma * ndtri(u)
+
+    def sample(self, gen, num_samples: int):
+        return gen.normal(self.mu, self.sigma, num_samples)
+
+
+def _stream(seed: Optional[int], name: str):
+    import numpy as np
+    from zlib import crc32
+
+    # one stream per hyperparameter: adding or removing a parameter leaves the others untouched
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(crc32(name.encode()),)))
+
+
+def _unit_cube(space: Dict[str, Sampler], num_samples: int, seed: Optional[int], method: str):
+    if method == 'lhs':
+        cube = {}
+        for name in space:
+            gen = _stream(seed, name)
+            cube[name] = (gen.permutation(num_samples) + gen.random(num_samples)) / num_samples
+
+        return cube
+
+    if method == 'sobol':
+        try:
+            from scipy.stats import qmc
+        except ImportError as ex:
+            raise ImportError("Sobol sampling requires scipy.") from ex
+
+        # keyed on the parameter names, so that sub-spaces drawn with the same seed get different designs
+        points = qmc.Sobol(d=len(space), scramble=True, seed=_stream(seed, '\0'.join(space))).random(num_samples)
+        return {name: points[:, i] for i, name in enumerate(space)}
+
+    raise ValueError(f"unknown sampling method '{method}'")
+
+
+def sample_space(space: Dict[str, Sampler],
+                 num_samples: int,
+                 seed: Optional[int] = None,
+                 method: str = 'random') -> Dict[str, Any]:
+
+    if method == 'random':
+        return {name: sampler.sample(_stream(seed, name), num_samples) for name, sampler in space.items()}
+
+    cube = _unit_cube(space, num_samples, seed, method)
+    return {name: sampler.ppf(cube[name]) for name, sampler in space.items()}
@@ -1 +1,4 @@
-from ._save import dump, load  # noqa: F401
+from ._save import dump, load, append  # noqa: F401
+from ._async import AsyncDumper  # noqa: F401
+from ._checkpoint import CheckpointWriter  # noqa: F401
+from ._metrics import MetricRecorder, load_metrics  # noqa: F401
@@ -0,0 +1,131 @@
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from ._save import dump, _append_all
+
+
+class AsyncDumper:
+    # writes on background threads; objects must not be modified once handed over
+
+    def __init__(self, num_workers: int = 1, max_pending: int = 64):
+        self.num_workers = num_workers
+        self.max_pending = max_pending
+
+        # per path, the writes still to do in order: a dump supersedes everything queued before it
+        self._pending: Dict[Path, List[Tuple[str, List[Any]]]] = {}
+        self._size = 0
+        self._active: Set[Path] = set()
+        self._error: Optional[BaseException] = None
+        self._stopping = False
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+    def dump(self, obj: Any, path: Union[Path, str]):
+        # without workers writes happen inline, as plain norm.io.dump
+        if self.num_workers == 0:
+            dump(obj, path)
+            return
+
+        self._put('dump', obj, Path(path))
+
+    def append(self, obj: Any, path: Union[Path, str]):
+        if self.num_workers == 0:
+            _append_all([obj], Path(path))
+            return
+
+        self._put('append', obj, Path(path))
+
+    def flush(self):
+        with self._cond:
+            while self._pending or self._active:
+                self._cond.wait()
+
+            self._raise()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            with self._cond:
+                threads, self._threads = self._threads, []
+                self._stopping = True
+                self._cond.notify_all()
+
+            for thread in threads:
+                thread.join()
+
+            self._stopping = False
+
+    def _put(self, op: str, obj: Any, path: Path):
+        with self._cond:
+            self._raise()
+
+            # callers wait for the writers once too much is queued, unless the write replaces a queued one
+            while self._size >= self.max_pending and not (op == 'dump' and path in self._pending):
+                self._cond.wait()
+                self._raise()
+
+            ops = self._pending.setdefault(path, [])
+            if op == 'dump':
+                self._size -= sum(len(objs) for _, objs in ops)
+                ops.clear()
+
+            if op == 'append' and ops and ops[-1][0] == 'append':
+                # consecutive records go out with a single open
+                ops[-1][1].append(obj)
+            else:
+                ops.append((op, [obj]))
+
+            self._size += 1
+
+            while len(self._threads) < self.num_workers:
+                thread = threading.Thread(target=self._loop, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+            self._cond.notify_all()
+
+    def _raise(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _next(self) -> Optional[Path]:
+        # a path is written by one worker at a time, so that the latest write lands last
+        return next((path for path in self._pending if path not in self._active), None)
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                path = self._next()
+                while path is None:
+                    if self._stopping and not self._pending:
+                        return
+
+                    self._cond.wait()
+                    path = self._next()
+
+                ops = self._pending.pop(path)
+                self._size -= sum(len(objs) for _, objs in ops)
+                self._active.add(path)
+                self._cond.notify_all()
+
+            try:
+                for op, objs in ops:
+                    if op == 'dump':
+                        dump(objs[-1], path)
+                    else:
+                        _append_all(objs, path)
+            except BaseException as ex:
+                with self._cond:
+                    self._error = ex
+
+            with self._cond:
+                self._active.discard(path)
+                self._cond.notify_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, t, v, traceback):
+        self.close()
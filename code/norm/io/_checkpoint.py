@@ -0,0 +1,24 @@
+from pathlib import Path
+from typing import Any, Union
+from ._async import AsyncDumper
+
+
+def _snapshot(obj: Any) -> Any:
+    # copies tensors to host memory so that training can keep updating them
+    if hasattr(obj, 'detach'):
+        return obj.detach().to('cpu', copy=True)
+
+    if isinstance(obj, dict):
+        return type(obj)((key, _snapshot(item)) for key, item in obj.items())
+
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_snapshot(item) for item in obj)
+
+    return obj
+
+
+class CheckpointWriter(AsyncDumper):
+    # checkpoints are snapshotted on submit, so the training loop never waits on disk
+
+    def submit(self, state: Any, path: Union[Path, str]):
+        self.dump(_snapshot(state), path)
@@ -1,74 +1,242 @@
+from collections.abc import Mapping
 from pathlib import Path
-from typing import Any
+from typing import IO, Any, Iterator
 
 
-def _dump_json(obj: Any, path: Path):
+def _dump_json(obj: Any, f: IO):
     import json
 
     try:
-        json.dump(obj,
-                  path.open("w"),
-                  indent=2)
+        # serialised up front so that a failure does not leave half a document behind
+        text = json.dumps(obj, indent=2)
     except TypeError as ex:
-        _dump_txt(obj, path)
+        _dump_txt(obj, f)
         print(f"Unable to dump obj in json format because of the following exception: {ex}")
         print("Obj dumped as string")
+        return
 
+    f.write(text)
 
-def _load_json(path: Path) -> Any:
+
+def _load_json(f: IO) -> Any:
+    import json
+
+    return json.load(f)
+
+
+def _to_builtin(obj: Any) -> Any:
+    # numpy/torch scalars and arrays expose .tolist(), everything else is logged as string
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+
+    return str(obj)
+
+
+def _dump_jsonl(obj: Any, f: IO):
+    import json
+
+    for record in obj:
+        f.write(json.dumps(record, default=_to_builtin) + "\n")
+
+
+def _append_jsonl(obj: Any, f: IO):
     import json
 
-    return json.load(path.open("r"))
+    f.write(json.dumps(obj, default=_to_builtin) + "\n")
 
 
-def _dump_bin(obj: Any, path: Path):
+def _load_jsonl(f: IO) -> Any:
+    import json
+
+    records = []
+    for line in f:
+        # a trailing record without newline is still being written
+        if not line.endswith("\n"):
+            break
+        records.append(json.loads(line))
+
+    return records
+
+
+def _dump_bin(obj: Any, f: IO):
     import pickle as pkl
 
-    pkl.dump(obj, path.open("wb"))
+    pkl.dump(obj, f, protocol=pkl.HIGHEST_PROTOCOL)
 
 
-def _load_bin(path: Path) -> Any:
+def _load_bin(f: IO) -> Any:
     import pickle as pkl
 
-    return pkl.load(path.open("rb"))
+    return pkl.load(f)
 
 
-def _dump_txt(obj: Any, path: Path):
-    f = open(path, 'w')
+def _dump_txt(obj: Any, f: IO):
     f.write(str(obj))
 
 
-def _load_txt(path: Path) -> str:
-    f = open(path, 'r')
+def _load_txt(f: IO) -> str:
     return str(f.read())
 
 
-def _dump_torch(obj: Any, path: Path):
+def _dump_torch(obj: Any, f: IO):
     from torch import save
 
-    save(obj, path)
+    save(obj, f)
 
 
-def _load_torch(path: Path) -> Any:
-    raise NotImplementedError()
+def _load_torch(f: IO) -> Any:
+    from torch import load
+
+    return load(f, weights_only=False)
+
+
+def _mmap_torch(path: Path) -> Any:
+    from torch import load
+
+    # storages are mapped from the file and paged in as tensors are touched
+    return load(str(path), mmap=True, map_location='cpu', weights_only=False)
+
+
+def _dump_npy(obj: Any, f: IO):
+    import numpy as np
+
+    np.save(f, obj)
+
+
+def _load_npy(f: IO) -> Any:
+    import numpy as np
+
+    return np.load(f)
+
+
+def _mmap_npy(path: Path) -> Any:
+    import numpy as np
+
+    return np.load(path, mmap_mode='r')
+
+
+def _dump_npz(obj: Any, f: IO):
+    import numpy as np
+
+    # members are stored uncompressed so that they can be memory-mapped, use a .gz suffix to compress
+    np.savez(f, **obj)
+
 
+def _load_npz(f: IO) -> Any:
+    import numpy as np
 
-def _dump_yaml(obj: Any, path: Path):
+    with np.load(f) as npz:
+        return dict(npz)
+
+
+class _NpzMembers(Mapping):
+    # stored members are mapped in place, compressed ones are read on access
+
+    def __init__(self, path: Path):
+        import zipfile
+
+        self._path = path
+        with zipfile.ZipFile(path) as zf:
+            self._members = {info.filename[:-len('.npy')]: info for info in zf.infolist() if info.filename.endswith('.npy')}
+
+    def __getitem__(self, key: str):
+        import numpy as np
+        import struct
+        import zipfile
+
+        info = self._members[key]
+
+        with open(self._path, 'rb') as f:
+            if info.compress_type == zipfile.ZIP_STORED:
+                # skip the local file header to reach the .npy header of the member
+                f.seek(info.header_offset + 26)
+                name_len, extra_len = struct.unpack('<HH', f.read(4))
+                f.seek(name_len + extra_len, 1)
+
+                version = np.lib.format.read_magic(f)
+                read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+                shape, fortran_order, dtype = read_header(f)
+
+                if not dtype.hasobject:
+                    return np.memmap(f, dtype=dtype, mode='r', offset=f.tell(), shape=shape, order='F' if fortran_order else 'C')
+
+        with zipfile.ZipFile(self._path) as zf, zf.open(info) as member:
+            return np.lib.format.read_array(member)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._members)
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+
+def _dump_yaml(obj: Any, f: IO):
     raise NotImplementedError()
 
 
-def _load_yaml(path: Path) -> Any:
+def _load_yaml(f: IO) -> Any:
     import yaml
 
-    return yaml.safe_load(open(path, 'r'))
+    return yaml.safe_load(f)
+
+
+def _open_gz(path: Path, mode: str) -> IO:
+    import gzip
+
+    # level 9 is several times slower than 6 for a few percent in size
+    return gzip.open(path, mode, compresslevel=6)
+
+
+def _open_bz2(path: Path, mode: str) -> IO:
+    import bz2
+
+    return bz2.open(path, mode)
+
+
+def _open_xz(path: Path, mode: str) -> IO:
+    import lzma
+
+    return lzma.open(path, mode)
+
+
+def _open_zst(path: Path, mode: str) -> IO:
+    try:
+        import zstandard
+    except ImportError as ex:
+        raise ImportError("'.zst' files require the zstandard package.") from ex
+
+    return zstandard.open(path, mode)
 
 
 IO_HELPERS = {
     'json': (_dump_json, _load_json),
+    'jsonl': (_dump_jsonl, _load_jsonl),
     'pkl': (_dump_bin, _load_bin),
     'pickle': (_dump_bin, _load_bin),
     'txt': (_dump_txt, _load_txt),
     'pth': (_dump_torch, _load_torch),
+    'npy': (_dump_npy, _load_npy),
+    'npz': (_dump_npz, _load_npz),
     'yaml': (_dump_yaml, _load_yaml),
     'yml': (_dump_yaml, _load_yaml)
 }
+
+APPEND_HELPERS = {
+    'jsonl': _append_jsonl
+}
+
+MMAP_HELPERS = {
+    'pth': _mmap_torch,
+    'npy': _mmap_npy,
+    'npz': _NpzMembers
+}
+
+# formats read and written as text, all others go through binary handles
+TEXT_FORMATS = {'json', 'jsonl', 'txt', 'yaml', 'yml'}
+
+COMPRESSORS = {
+    'gz': _open_gz,
+    'bz2': _open_bz2,
+    'xz': _open_xz,
+    'zst': _open_zst
+}
@@ -0,0 +1,166 @@
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+_CAPACITY = 1024
+
+
+def _is_scalar(value: Any) -> bool:
+    from numbers import Number
+
+    # numpy and torch scalars are zero-dimensional
+    return isinstance(value, Number) or getattr(value, 'ndim', None) == 0
+
+
+class MetricRecorder:
+
+    def __init__(self):
+        self._columns: Dict[str, Any] = {}
+        self._sizes: Dict[str, int] = {}
+        self._pending: Dict[str, List[Any]] = {}
+        # stats that are not scalars, as {'key', 'row', 'value'} records
+        self.objects: List[Dict[str, Any]] = []
+
+    def _len(self, key: str) -> int:
+        return self._sizes.get(key, 0) + len(self._pending.get(key, ()))
+
+    def _append(self, key: str, value: float):
+        import numpy as np
+
+        column = self._columns.get(key)
+        size = self._sizes.get(key, 0)
+
+        if column is None:
+            column = self._columns[key] = np.empty(_CAPACITY)
+        elif size == len(column):
+            # amortised O(1) appends
+            column = self._columns[key] = np.resize(column, 2 * len(column))
+
+        column[size] = value
+        self._sizes[key] = size + 1
+
+    def _flush(self, key: str):
+        pending = self._pending.pop(key, None)
+
+        # the first conversion waits for the device, the others find their values ready
+        for value in pending or ():
+            self._append(key, float(value))
+
+    def add(self, key: str, value: Any):
+        import numpy as np
+
+        if not _is_scalar(value):
+            self.objects.append(dict(key=key, row=self._len(key), value=value))
+            return
+
+        # tensors are converted in batches, a float() per step would synchronise with the device every time
+        if hasattr(value, 'detach') or key in self._pending:
+            if key not in self._columns:
+                self._columns[key] = np.empty(_CAPACITY)
+
+            pending = self._pending.setdefault(key, [])
+            pending.append(value.detach() if hasattr(value, 'detach') else value)
+            if len(pending) == _CAPACITY:
+                self._flush(key)
+            return
+
+        self._append(key, float(value))
+
+    def _pad(self, key: str, size: int):
+        for _ in range(size - self._len(key)):
+            self.add(key, float('nan'))
+
+    def update(self, stats: Dict[str, Any], prefix: str = ''):
+        # one row of the prefix's columns: columns missing from it, or first seen in it, are padded
+        # with NaN so that every column stays aligned with its step column; without a prefix the row spans all columns
+        group = [key for key in self._columns if key.startswith(prefix)]
+        row = max((self._len(key) for key in group), default=0)
+
+        for key, value in stats.items():
+            if _is_scalar(value):
+                self._pad(prefix + key, row)
+                self.add(prefix + key, value)
+            else:
+                self.objects.append(dict(key=prefix + key, row=row, value=value))
+
+        for key in set(group) | {prefix + key for key, value in stats.items() if _is_scalar(value)}:
+            self._pad(key, row + 1)
+
+    def __getitem__(self, key: str):
+        self._flush(key)
+        return self._columns[key][:self._sizes.get(key, 0)]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._columns
+
+    def keys(self):
+        return self._columns.keys()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {key: self[key].copy() for key in self.keys()}
+
+    @classmethod
+    def from_dict(cls, columns: Dict[str, Any], objects: Optional[List[Dict[str, Any]]] = None) -> 'MetricRecorder':
+        import numpy as np
+
+        recorder = cls()
+        for key, column in columns.items():
+            recorder._columns[key] = np.array(column, dtype=np.float64)
+            recorder._sizes[key] = len(column)
+
+        recorder.objects = list(objects or [])
+
+        return recorder
+
+    def save(self, path: Union[Path, str]):
+        from ._save import dump
+
+        path = Path(path)
+
+        # .npz is compact, a directory of .npy files can be memory-mapped column by column
+        if path.suffix == '.npz':
+            dump(self.as_dict(), path)
+            objects_path = path.with_suffix('.jsonl')
+        else:
+            for key in self.keys():
+                dump(self[key], path / f'{key}.npy')
+            objects_path = path / 'objects.jsonl'
+
+        if self.objects:
+            dump(self.objects, objects_path)
+
+    def __getstate__(self):
+        return dict(columns=self.as_dict(), objects=self.objects)
+
+    def __setstate__(self, state):
+        self.__dict__.update(MetricRecorder.from_dict(state['columns'], state['objects']).__dict__)
+
+
+class _Columns(Mapping):
+    # reads a column from disk only when it is accessed
+
+    def __init__(self, path: Path, mmap: bool):
+        self._files = {f.stem: f for f in sorted(path.glob('*.npy'))}
+        self._mmap = mmap
+
+    def __getitem__(self, key: str):
+        import numpy as np
+        return np.load(self._files[key], mmap_mode='r' if self._mmap else None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._files)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+
+def load_metrics(path: Union[Path, str], mmap: bool = False) -> Mapping:
+    import numpy as np
+
+    path = Path(path)
+
+    if path.suffix == '.npz':
+        # NpzFile already decompresses members lazily
+        return np.load(path)
+
+    return _Columns(path, mmap)
@@ -1,36 +1,84 @@
-import warnings
+import os
+import threading
 from pathlib import Path
-from typing import Union, Any
-from ._helpers import IO_HELPERS
+from typing import IO, Any, Callable, List, Optional, Tuple, Union
+from ._helpers import IO_HELPERS, APPEND_HELPERS, COMPRESSORS, MMAP_HELPERS, TEXT_FORMATS
 
 
-def _resolve(path: str):
-
-    try:
-        ext = path.split('.')[-1]
-    except ValueError:
-        warnings.warn("File extension is missing, the object will be dumped as a binary file. \
-        If this is the intended behaviour, make sure to specify .pkl as file extension.")
-        return IO_HELPERS['pkl']
+def _resolve(name: str) -> Tuple[str, Optional[Callable]]:
+    # 'results.pkl' -> ('pkl', None), 'results.pkl.zst' -> ('pkl', zstd opener)
+    parts = name.split('.')
+    compress = COMPRESSORS[parts.pop()] if len(parts) > 2 and parts[-1] in COMPRESSORS else None
+    ext = parts[-1]
 
     if ext not in IO_HELPERS:
         raise ValueError(f"unable to figure out extension '{ext}'")
 
-    return IO_HELPERS[ext]
+    return ext, compress
+
+
+def _open(path: Path, mode: str, ext: str, compress: Optional[Callable]) -> IO:
+    mode += 't' if ext in TEXT_FORMATS else 'b'
+
+    if compress is None:
+        return open(path, mode)
 
+    return compress(path, mode)
 
-def dump(obj: Any, path: Union[Path, str]):
+
+def dump(obj: Any, path: Union[Path, str], atomic: bool = True):
     path = Path(path)
 
     path.parent.mkdir(parents=True,
                       exist_ok=True)
 
-    dump_, _ = _resolve(path.name)
-    dump_(obj, path)
+    ext, compress = _resolve(path.name)
+    dump_, _ = IO_HELPERS[ext]
+
+    if not atomic:
+        with _open(path, 'w', ext, compress) as f:
+            dump_(obj, f)
+        return
 
+    # readers see either the previous file or the complete new one, never a truncated one
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        with _open(tmp, 'w', ext, compress) as f:
+            dump_(obj, f)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
 
-def load(path: Union[Path, str]) -> Any:
+
+def load(path: Union[Path, str], mmap: bool = False) -> Any:
     path = Path(path)
 
-    _, load_ = _resolve(path.name)
-    return load_(path)
+    ext, compress = _resolve(path.name)
+    _, load_ = IO_HELPERS[ext]
+
+    if mmap:
+        if ext not in MMAP_HELPERS or compress is not None:
+            raise ValueError(f"'{path.name}' cannot be memory-mapped")
+
+        return MMAP_HELPERS[ext](path)
+
+    with _open(path, 'r', ext, compress) as f:
+        return load_(f)
+
+
+def _append_all(objs: List[Any], path: Path):
+    ext, compress = _resolve(path.name)
+    if ext not in APPEND_HELPERS:
+        raise ValueError(f"extension '{ext}' does not support appending")
+
+    path.parent.mkdir(parents=True,
+                      exist_ok=True)
+
+    with _open(path, 'a', ext, compress) as f:
+        for obj in objs:
+            APPEND_HELPERS[ext](obj, f)
+
+
+def append(obj: Any, path: Union[Path, str]):
+    _append_all([obj], Path(path))
@@ -0,0 +1 @@
+from ._prefetch import PrefetchLoader  # noqa: F401
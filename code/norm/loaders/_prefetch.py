@@ -0,0 +1,114 @@
+import threading
+import time
+from norm._typings import BaseLoader
+from queue import Queue, Full
+from typing import Optional
+
+_POLL = 0.1
+
+
+class _Failure:
+    def __init__(self, ex: BaseException):
+        self.ex = ex
+
+
+class PrefetchLoader(BaseLoader):
+    # batches of one size are built ahead on a thread. Reseeding drops them and stops the thread, which
+    # restarts on the next call; within a trial, the wrapped loader has to draw from its own generator
+    # for the batches not to depend on when the thread runs
+
+    def __init__(self,
+                 loader: BaseLoader,
+                 batch_size: Optional[int] = None,
+                 num_batches: int = 2):
+
+        assert num_batches > 0, "At least one batch has to be prefetched"
+
+        self.loader = loader
+        # None takes the first batch size requested, the one of the training loop
+        self.batch_size = batch_size
+        self._fixed = batch_size is not None
+        self.num_batches = num_batches
+        self._reset()
+
+    def _reset(self):
+        self.stall_time = 0.0
+        self.num_served = 0
+        self._queue = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def next(self, batch_size: Optional[int] = None):
+        if not self._fixed:
+            self.batch_size, self._fixed = batch_size, True
+
+        if batch_size != self.batch_size:
+            # only batches of the configured size are prefetched
+            with self._lock:
+                return self.loader.next(batch_size)
+
+        if self._thread is None:
+            self._start()
+
+        start = time.perf_counter()
+        item = self._queue.get()
+        self.stall_time += time.perf_counter() - start
+        self.num_served += 1
+
+        if isinstance(item, _Failure):
+            raise item.ex
+
+        return item
+
+    def stats(self) -> dict:
+        return dict(num_batches=self.num_served,
+                    stall_time=self.stall_time,
+                    mean_stall=self.stall_time / max(self.num_served, 1))
+
+    def close(self):
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._queue = self._thread = None
+        self._stop.clear()
+
+    def _start(self):
+        from norm import _RNG_USERS
+        _RNG_USERS.add(self)
+
+        self._queue = Queue(maxsize=self.num_batches)
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def _produce(self):
+        while not self._stop.is_set():
+            try:
+                with self._lock:
+                    item = self.loader.next(self.batch_size)
+            except BaseException as ex:
+                item = _Failure(ex)
+
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(item, timeout=_POLL)
+                    break
+                except Full:
+                    continue
+
+            if isinstance(item, _Failure):
+                return
+
+    def __getstate__(self):
+        # threads and queues do not travel to remote workers, they are restarted lazily
+        state = self.__dict__.copy()
+        for key in ('_queue', '_thread', '_stop', '_lock'):
+            del state[key]
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._reset()
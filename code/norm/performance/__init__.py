@@ -1 +1,2 @@
 from ._timer import Timer  # noqa: F401
+from ._profiler import Profiler  # noqa: F401
@@ -0,0 +1,130 @@
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple, Union
+from ._timer import Timer
+
+
+class _Stats:
+    __slots__ = ('count', 'total', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.samples: List[float] = []
+
+
+class _Section(Timer):
+
+    def __init__(self, profiler: 'Profiler', name: str):
+        super().__init__(name, logger=None)
+        self.profiler = profiler
+
+    def __enter__(self):
+        self.profiler._push(self.name)
+        self.start()
+        return self
+
+    def __exit__(self, t, v, traceback):
+        elapsed = self.stop()
+        self.profiler._pop(self._start, elapsed)
+
+
+class Profiler:
+    # sections nest per thread, their paths form the tree; stats are shared by all threads
+
+    def __init__(self,
+                 trace: bool = False,
+                 max_samples: int = 10000,
+                 max_events: int = 1000000):
+
+        self.trace = trace
+        self.max_samples = max_samples
+        self.max_events = max_events
+
+        self._stats: Dict[Tuple[str, ...], _Stats] = {}
+        self._events: List[Tuple[str, float, float, int]] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._rng = random.Random(0)
+        self._origin = time.perf_counter()
+
+    def section(self, name: str) -> Timer:
+        return _Section(self, name)
+
+    def _push(self, name: str):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        stack.append(name)
+
+    def _pop(self, start: float, elapsed: float):
+        stack = self._local.stack
+        path = tuple(stack)
+        stack.pop()
+
+        with self._lock:
+            stats = self._stats.get(path)
+            if stats is None:
+                stats = self._stats[path] = _Stats()
+
+            stats.count += 1
+            stats.total += elapsed
+
+            # percentiles come from a bounded reservoir of durations
+            if len(stats.samples) < self.max_samples:
+                stats.samples.append(elapsed)
+            else:
+                slot = self._rng.randrange(stats.count)
+                if slot < self.max_samples:
+                    stats.samples[slot] = elapsed
+
+            if self.trace and len(self._events) < self.max_events:
+                self._events.append((path[-1], start, elapsed, threading.get_ident()))
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        import numpy as np
+
+        with self._lock:
+            items = sorted((path, stats.count, stats.total, list(stats.samples)) for path, stats in self._stats.items())
+
+        report = {}
+        for path, count, total, samples in items:
+            p50, p99 = np.quantile(samples, [0.5, 0.99])
+            report['/'.join(path)] = dict(count=count,
+                                          total=total,
+                                          mean=total / count,
+                                          p50=float(p50),
+                                          p99=float(p99))
+
+        return report
+
+    def report(self, logger: Callable[[str], None] = print):
+        for path, stats in self.stats().items():
+            depth = path.count('/')
+            logger(f"{'  ' * depth}{path.split('/')[-1]:<{32 - 2 * depth}} "
+                   f"count={stats['count']:<8} total={stats['total']:.3f}s mean={stats['mean'] * 1e3:.3f}ms "
+                   f"p50={stats['p50'] * 1e3:.3f}ms p99={stats['p99'] * 1e3:.3f}ms")
+
+    def export_chrome_trace(self, path: Union[Path, str]):
+        from norm.io import dump
+
+        with self._lock:
+            events = list(self._events)
+
+        # complete events in microseconds, loadable in chrome://tracing and Perfetto
+        dump(dict(traceEvents=[dict(name=name,
+                                    ph='X',
+                                    ts=(start - self._origin) * 1e6,
+                                    dur=elapsed * 1e6,
+                                    pid=os.getpid(),
+                                    tid=tid) for name, start, elapsed, tid in events],
+                  displayTimeUnit='ms'), path)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._events.clear()
@@ -1,2 +1,4 @@
 from ._figure import new_figure  # noqa: F401
 from ._line_style import LineStyle  # noqa: F401
+from ._render import render_all  # noqa: F401
+from ._aggregate import Curves, load_curves  # noqa: F401
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from ._figure import Figure
+from ._line_style import LineStyle
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+from numpy.typing import NDArray
+import numpy as np
+
+
+@dataclass(init=True)
+class Curves:
+    steps: NDArray[float]
+    mean: NDArray[float]
+    std_error: NDArray[float]
+    count: NDArray[int]
+    quantiles: Dict[float, NDArray[float]]
+
+    def add_to(self,
+               figure: Figure,
+               label: Optional[str] = "",
+               color: Optional[str] = None,
+               style: Optional[LineStyle] = LineStyle.Simple) -> Figure:
+
+        return figure.add_line(self.steps, self.mean, label=label, std_error=self.std_error, color=color, style=style)
+
+
+def _metric_files(path: Path, stage: str, runs: Optional[Iterable[str]]) -> List[Path]:
+    from norm.io import load
+
+    if stage == 'test':
+        return [path / file for file in load(path / 'test_info.json')['metrics']]
+
+    if stage != 'valid':
+        raise ValueError(f"unknown stage '{stage}'")
+
+    runs = set(runs) if runs is not None else None
+    files = []
+    for info in sorted(path.glob('*/train_info.json')):
+        if runs is None or info.parent.name in runs:
+            files.extend(info.parent / file for file in load(info).get('metrics', []))
+
+    return files
+
+
+def _columns(path: Path, key: str, values: bool = True):
+    from norm.io import load_metrics
+
+    # only the requested columns are decompressed
+    metrics = load_metrics(path)
+    try:
+        if key not in metrics:
+            return None, None
+
+        # logged stats carry their step in a sibling column, per-step series are implicit
+        step_key = key.split('_', 1)[0] + '_step'
+        if step_key in metrics and not values:
+            return np.asarray(metrics[step_key]), None
+
+        column = np.asarray(metrics[key], dtype=np.float64)
+        steps = np.asarray(metrics[step_key]) if step_key in metrics else np.arange(1, len(column) + 1)
+
+        return steps, column
+    finally:
+        if hasattr(metrics, 'close'):
+            metrics.close()
+
+
+def load_curves(path: Union[Path, str],
+                key: str = 'vl_score',
+                stage: str = 'valid',
+                runs: Optional[Iterable[str]] = None,
+                quantiles: Sequence[float] = (),
+                chunk_size: int = 256) -> Curves:
+
+    path = Path(path)
+    files = _metric_files(path, stage, runs)
+
+    # a first pass over the step columns fixes the grid every curve is aligned to
+    grid = np.zeros(0)
+    for file in files:
+        steps, _ = _columns(file, key, values=False)
+        if steps is not None:
+            grid = np.union1d(grid, steps)
+
+    if not len(grid):
+        raise ValueError(f"no '{key}' curves found in {path}")
+
+    count = np.zeros(len(grid), dtype=np.int64)
+    mean, m2 = np.zeros(len(grid)), np.zeros(len(grid))
+    kept = [] if quantiles else None
+
+    # curves are aligned a chunk at a time, so moments only ever hold chunk_size rows
+    for start in range(0, len(files), chunk_size):
+        chunk = np.full((min(chunk_size, len(files) - start), len(grid)), np.nan)
+
+        for row, file in enumerate(files[start:start + chunk_size]):
+            steps, values = _columns(file, key)
+            if steps is not None:
+                chunk[row, np.searchsorted(grid, steps[:len(values)])] = values[:len(steps)]
+
+        # moments of the chunk, merged into the running ones with Chan's pairwise update: sums of
+        # squares would cancel out for curves with a large mean and a small spread
+        valid = ~np.isnan(chunk)
+        chunk_count = valid.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            chunk_mean = np.where(valid, chunk, 0).sum(axis=0) / chunk_count
+            chunk_m2 = np.where(valid, (chunk - chunk_mean) ** 2, 0).sum(axis=0)
+
+            merged = count + chunk_count
+            delta = np.where(chunk_count > 0, chunk_mean - mean, 0)
+            weight = np.where(merged > 0, chunk_count / merged, 0)
+            m2 += np.where(chunk_count > 0, chunk_m2, 0) + delta ** 2 * count * weight
+            mean += delta * weight
+            count = merged
+
+        # quantiles need every value of a step, the rows are kept in single precision
+        if kept is not None:
+            kept.append(chunk.astype(np.float32))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(count > 0, mean, np.nan)
+        std_error = np.where(count > 1, np.sqrt(m2 / (count - 1) / count), 0)
+
+    if kept is not None:
+        matrix = np.concatenate(kept)
+        quantiles = dict(zip(quantiles, np.nanquantile(matrix, list(quantiles), axis=0)))
+    else:
+        quantiles = {}
+
+    return Curves(steps=grid, mean=mean, std_error=std_error, count=count, quantiles=quantiles)
@@ -0,0 +1,83 @@
+from typing import Optional, Tuple
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, num_points: int) -> np.ndarray:
+    # largest triangle three buckets, returns the indices of the points to keep
+    n = len(x)
+    if num_points >= n or num_points < 3:
+        return np.arange(n)
+
+    # first and last points are always kept, the others are split in equally sized buckets
+    edges = np.linspace(1, n - 1, num_points - 1).astype(np.int64)
+    idx = np.empty(num_points, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+
+    a = 0
+    for i in range(num_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+
+        # the third vertex is the mean of the next bucket, or the last point
+        if i + 2 < len(edges):
+            cx, cy = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = idx[i + 1] = lo + int(np.argmax(area))
+
+    return idx
+
+
+def minmax(x: np.ndarray, y: np.ndarray, num_points: int) -> np.ndarray:
+    # keeps the lowest and the highest point of each bucket
+    n = len(y)
+    if num_points < 2 or num_points >= n:
+        return np.arange(n)
+
+    size = -(-n // (num_points // 2))
+    num_buckets = -(-n // size)
+
+    padded = np.full(num_buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(num_buckets, size)
+    nan = np.isnan(padded)
+
+    offsets = np.arange(num_buckets)[:, None] * size
+    lows = np.argmin(np.where(nan, np.inf, padded), axis=1)[:, None]
+    highs = np.argmax(np.where(nan, -np.inf, padded), axis=1)[:, None]
+
+    return np.unique(np.minimum(offsets + np.hstack([lows, highs]), n - 1))
+
+
+_METHODS = {
+    'lttb': lttb,
+    'minmax': minmax
+}
+
+
+def downsample(x,
+               y,
+               std_error=None,
+               num_points: int = 2000,
+               method: str = 'lttb') -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+
+    # returns x, y and the lower/upper borders of the error band
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+
+    if method not in _METHODS:
+        raise ValueError(f"unknown downsampling method '{method}'")
+
+    idx = np.unique(_METHODS[method](x, y, num_points))
+
+    if std_error is None:
+        return x[idx], y[idx], None, None
+
+    lower, upper = y - std_error, y + std_error
+    if len(idx) == len(x):
+        return x, y, lower, upper
+
+    # each kept point covers the samples closer to it than to its neighbours, the band
+    # takes the envelope over them so that it never looks narrower than it is
+    starts = np.concatenate([[0], (idx[:-1] + idx[1:] + 1) // 2])
+    return x[idx], y[idx], np.minimum.reduceat(lower, starts), np.maximum.reduceat(upper, starts)
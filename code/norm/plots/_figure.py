@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+from ._downsample import downsample as downsample_
 from ._line_style import LineStyle
 from dataclasses import dataclass
 from typing import List, Optional, Tuple, Union
 from numpy import array
+import numpy as np
 from numpy.typing import NDArray
 
 _ALPHA = 0.25
+# bumped whenever a change to the drawing code alters the output
+_RENDER_VERSION = 1
+# png text chunk holding the content hash of the figure
+_HASH_KEY = 'norm-hash'
 
 FloatArray = Union[List[float], NDArray[float]]
 
@@ -37,6 +43,8 @@ class Figure:
     has_legend: bool
     fontsize: Optional[str]
     dpi: int
+    max_points: Optional[int] = 2000
+    downsample: str = 'lttb'
 
     def add_line(self,
                  x_data: FloatArray,
@@ -62,46 +70,110 @@ class Figure:
 
         return self  # allow chainable operations
 
-    def finalize(self, show=True, save=True):
-        from matplotlib import pyplot as plt
+    def content_hash(self) -> str:
+        import hashlib
+
+        # everything that ends up in the png: styling, sampling and the data of each line
+        digest = hashlib.sha256(repr((_RENDER_VERSION, self.name, self.title, self.theme, self.x_label, self.y_label,
+                                      self.x_ticks, self.y_ticks, self.x_lim, self.y_lim, self.x_scale, self.y_scale,
+                                      self.has_legend, self.fontsize, self.dpi, self.max_points, self.downsample)).encode())
+
+        for line in self.lines:
+            digest.update(repr((line.color, line.style.value, line.label)).encode())
+            for data in (line.x_data, line.y_data, line.std_error):
+                data = np.ascontiguousarray(data if data is not None else [])
+                digest.update(repr((data.dtype.str, data.shape)).encode())
+                digest.update(data.tobytes())
+
+        return digest.hexdigest()
+
+    def _lines(self):
+        from matplotlib import rcParams
+
+        # lines without a color take the next one of the theme's cycle, as plt.plot would
+        cycle = rcParams['axes.prop_cycle'].by_key().get('color', ['C0'])
+        colors = iter(cycle * (len(self.lines) // len(cycle) + 1))
+
+        for line in self.lines:
+            if self.max_points:
+                x, y, lower, upper = downsample_(line.x_data, line.y_data, line.std_error, self.max_points, self.downsample)
+            else:
+                x, y = line.x_data, line.y_data
+                lower, upper = (y - line.std_error, y + line.std_error) if line.std_error is not None else (None, None)
+
+            yield line, line.color or next(colors), x, y, lower, upper
+
+    def _draw(self, fig):
+        from matplotlib import rcParams
+        from matplotlib.collections import LineCollection, PolyCollection
         from matplotlib.colors import to_rgba
+        from matplotlib.lines import Line2D
+
+        ax = fig.add_subplot()
+
+        # general config
+        ax.set_title(self.title, fontsize=self.fontsize)
+        ax.set_xlabel(self.x_label)
+        ax.set_ylabel(self.y_label)
+
+        # all lines, and all error bands, are drawn by a single artist each
+        segments, colors, styles, bands, band_colors, handles = [], [], [], [], [], []
+        for line, color, x, y, lower, upper in self._lines():
+            segments.append(np.column_stack([x, y]))
+            colors.append(color)
+            styles.append(line.style.value)
+
+            if lower is not None:
+                bands.append(np.column_stack([np.concatenate([x, x[::-1]]), np.concatenate([lower, upper[::-1]])]))
+                band_colors.append((*to_rgba(color)[:-1], _ALPHA))
 
-        with plt.style.context(self.theme):
-            # general config
-            plt.title(self.title, fontsize=self.fontsize)
-            plt.xticks(ticks=self.x_ticks)
-            plt.yticks(ticks=self.y_ticks)
-            plt.xlim(self.x_lim)
-            plt.ylim(self.y_lim)
-            plt.xlabel(self.x_label)
-            plt.ylabel(self.y_label)
-
-            # plot lines
-            for line in self.lines:
-                plt.plot(line.x_data, line.y_data,
-                         line.color, linestyle=line.style.value,
-                         label=line.label)
-                if line.std_error is not None:
-                    plt.fill_between(line.x_data,
-                                     line.y_data - line.std_error,
-                                     line.y_data + line.std_error,
-                                     color=(*to_rgba(line.color)[:-1], _ALPHA))
-
-            if self.has_legend:
-                plt.legend(fontsize=self.fontsize)
-
-            if self.y_scale == "log":
-                plt.yscale(self.y_scale, base=10)
-
-            if self.x_scale == "log":
-                plt.xscale(self.x_scale, base=10)
+            if line.label:
+                handles.append(Line2D([], [], color=color, linestyle=line.style.value, label=line.label))
+
+        if bands:
+            ax.add_collection(PolyCollection(bands, facecolors=band_colors, edgecolors='none'))
+
+        ax.add_collection(LineCollection(segments, colors=colors, linestyles=styles, linewidths=rcParams['lines.linewidth']))
+
+        if self.has_legend:
+            ax.legend(handles=handles, fontsize=self.fontsize)
+
+        if self.y_scale == "log":
+            ax.set_yscale(self.y_scale, base=10)
+
+        if self.x_scale == "log":
+            ax.set_xscale(self.x_scale, base=10)
+
+        # collections do not rescale the axes by themselves
+        ax.autoscale_view()
+        if self.x_ticks is not None:
+            ax.set_xticks(self.x_ticks)
+        if self.y_ticks is not None:
+            ax.set_yticks(self.y_ticks)
+        ax.set_xlim(self.x_lim)
+        ax.set_ylim(self.y_lim)
+
+    def finalize(self, show=True, save=True):
+        from matplotlib import style
+
+        with style.context(self.theme):
+            if show:
+                from matplotlib import pyplot as plt
+                fig = plt.figure()
+            else:
+                # headless figures never touch pyplot's global state
+                from matplotlib.backends.backend_agg import FigureCanvasAgg
+                from matplotlib.figure import Figure as MplFigure
+                fig = MplFigure()
+                FigureCanvasAgg(fig)
+
+            self._draw(fig)
 
             if save:
-                plt.savefig(f'{self.name}.png', dpi=self.dpi)
+                fig.savefig(f'{self.name}.png', dpi=self.dpi, metadata={_HASH_KEY: self.content_hash()})
             if show:
                 plt.show()
-
-            plt.close()
+                plt.close(fig)
 
 
 def new_figure(name: str,
@@ -117,7 +189,9 @@ def new_figure(name: str,
                y_scale: Optional[str] = "linear",
                has_legend: Optional[bool] = False,
                fontsize: Optional[str] = "x-large",
-               dpi: Optional[int] = 300) -> Figure:
+               dpi: Optional[int] = 300,
+               max_points: Optional[int] = 2000,
+               downsample: str = 'lttb') -> Figure:
 
     return Figure(name=name,
                   title=title,
@@ -133,4 +207,6 @@ def new_figure(name: str,
                   has_legend=has_legend,
                   fontsize=fontsize,
                   dpi=dpi,
+                  max_points=max_points,
+                  downsample=downsample,
                   lines=[])
@@ -0,0 +1,49 @@
+from ._figure import Figure, _HASH_KEY
+from pathlib import Path
+from typing import List, Optional
+
+
+def _rendered_hash(path: Path) -> Optional[str]:
+    from PIL import Image
+
+    if not path.exists():
+        return None
+
+    try:
+        # open() parses the chunks up to the pixel data, the tEXt ones land in info; .text would decode the image
+        with Image.open(path) as image:
+            return image.info.get(_HASH_KEY)
+    except (OSError, SyntaxError):
+        return None
+
+
+def _render(figure: Figure):
+    figure.finalize(show=False, save=True)
+
+
+def render_all(figures: List[Figure],
+               num_workers: Optional[int] = None,
+               force: bool = False) -> List[bool]:
+
+    import os
+
+    # figures whose png was rendered from identical content are skipped
+    todo = [force or _rendered_hash(Path(f'{figure.name}.png')) != figure.content_hash() for figure in figures]
+    pending = [figure for figure, render in zip(figures, todo) if render]
+
+    num_workers = min(num_workers or os.cpu_count() or 1, len(pending))
+
+    if num_workers <= 1:
+        for figure in pending:
+            _render(figure)
+    else:
+        import multiprocessing as mp
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(num_workers, mp_context=mp.get_context('spawn')) as pool:
+            for _ in pool.map(_render, pending):
+                pass
+
+    print(f"[info]: rendered {len(pending)} figures, {len(figures) - len(pending)} up to date.")
+
+    return todo
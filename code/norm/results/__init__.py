@@ -0,0 +1 @@
+from ._index import ResultsIndex  # noqa: F401
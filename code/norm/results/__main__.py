@@ -0,0 +1,12 @@
+from ._index import ResultsIndex
+from argparse import ArgumentParser
+from pathlib import Path
+
+parser = ArgumentParser(prog='python -m norm.results')
+parser.add_argument('command', choices=['rescan'])
+parser.add_argument('root', type=Path)
+parser.add_argument('--db', type=Path, default=None, help="defaults to <root>/results.db")
+args = parser.parse_args()
+
+index = ResultsIndex(args.db or args.root / 'results.db')
+print(f"indexed {index.rescan(args.root)} runs in {index.path}")
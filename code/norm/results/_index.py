@@ -0,0 +1,151 @@
+import json
+import sqlite3
+from contextlib import closing
+from norm.io import load
+from numbers import Number
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    experiment TEXT, run TEXT, seed INTEGER, mean_score REAL, std_score REAL,
+    num_trials INTEGER, stopped INTEGER, config TEXT, path TEXT,
+    PRIMARY KEY (experiment, run));
+CREATE TABLE IF NOT EXISTS params (
+    experiment TEXT, run TEXT, name TEXT, real REAL, text TEXT,
+    PRIMARY KEY (experiment, run, name));
+CREATE INDEX IF NOT EXISTS params_by_value ON params (name, real);
+CREATE TABLE IF NOT EXISTS tests (
+    experiment TEXT PRIMARY KEY, run TEXT, mean_score REAL, std_score REAL,
+    num_trials INTEGER, path TEXT);
+"""
+
+_RUN_COLUMNS = ('seed', 'mean_score', 'std_score', 'num_trials', 'stopped')
+_OPERATORS = ('<', '<=', '>', '>=', '=', '!=')
+
+Filter = Tuple[str, Any]
+
+
+def _param_row(experiment: str, run: str, name: str, value: Any):
+    # numbers are queried by value, anything else is matched as text
+    if isinstance(value, Number):
+        return experiment, run, name, float(value), None
+
+    return experiment, run, name, None, value if isinstance(value, str) else json.dumps(value)
+
+
+def _run_rows(run_path: Path, experiment: Optional[str]):
+    info = load(run_path / 'train_info.json')
+    config = load(run_path / 'parameters.json') if (run_path / 'parameters.json').exists() else {}
+    experiment = experiment or run_path.parent.name
+
+    run = (experiment, run_path.name, info.get('seed'), info.get('mean_score'), info.get('std_score'),
+           info.get('num_trials'), int(info.get('stopped', False)), json.dumps(config, default=str), str(run_path))
+    params = [_param_row(experiment, run_path.name, name, value) for name, value in config.items()]
+
+    return run, params
+
+
+def _test_row(exp_path: Path):
+    info = load(exp_path / 'test_info.json')
+    best = load(exp_path / 'best_run.json') if (exp_path / 'best_run.json').exists() else {'meta': {}}
+
+    return (exp_path.name, best['meta'].get('name'), info.get('mean_score'), info.get('std_score'),
+            info.get('num_trials'), str(exp_path))
+
+
+class ResultsIndex:
+
+    def __init__(self, path: Union[Path, str]):
+        self.path = Path(path)
+
+    def _connect(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=60)
+        connection.executescript(_SCHEMA)
+        return connection
+
+    def _insert(self, runs: Iterable, params: Iterable, tests: Iterable = ()):
+        with closing(self._connect()) as db, db:
+            db.executemany("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", runs)
+            db.executemany("INSERT OR REPLACE INTO params VALUES (?, ?, ?, ?, ?)", params)
+            db.executemany("INSERT OR REPLACE INTO tests VALUES (?, ?, ?, ?, ?, ?)", tests)
+
+    def add_run(self, run_path: Path, experiment: Optional[str] = None):
+        run, params = _run_rows(Path(run_path), experiment)
+        self._insert([run], params)
+
+    def add_test(self, exp_path: Path):
+        self._insert([], [], [_test_row(Path(exp_path))])
+
+    def rescan(self, root: Path) -> int:
+        runs, params, tests = [], [], []
+
+        for info in Path(root).rglob('train_info.json'):
+            run, params_ = _run_rows(info.parent, None)
+            runs.append(run)
+            params.extend(params_)
+
+        for info in Path(root).rglob('test_info.json'):
+            tests.append(_test_row(info.parent))
+
+        self._insert(runs, params, tests)
+        return len(runs)
+
+    def query(self,
+              where: Optional[Dict[str, Filter]] = None,
+              experiment: Optional[str] = None,
+              params: Sequence[str] = (),
+              order_by: str = 'mean_score',
+              descending: bool = True,
+              limit: Optional[int] = None):
+
+        import numpy as np
+
+        where = where or {}
+        params = list(params)
+        clauses, args, joins = [], [], []
+
+        # every parameter used in a filter or requested as a column gets its own join
+        for i, name in enumerate(dict.fromkeys([*where, *params, order_by])):
+            if name in _RUN_COLUMNS or name in ('experiment', 'run'):
+                continue
+
+            joins.append(f"LEFT JOIN params p{i} ON p{i}.experiment = r.experiment AND p{i}.run = r.run AND p{i}.name = ?")
+            args.append(name)
+
+        aliases = {name: f"r.{name}" for name in (*_RUN_COLUMNS, 'experiment', 'run')}
+        for i, name in enumerate(dict.fromkeys([*where, *params, order_by])):
+            aliases.setdefault(name, f"COALESCE(p{i}.real, p{i}.text)")
+
+        for name, (op, value) in where.items():
+            assert op in _OPERATORS, f"unsupported operator '{op}'"
+            clauses.append(f"{aliases[name]} {op} ?")
+            args.append(value)
+
+        if experiment is not None:
+            clauses.append("r.experiment = ?")
+            args.append(experiment)
+
+        columns = ['experiment', 'run', 'seed', 'mean_score', 'std_score', *params]
+        sql = f"SELECT {', '.join(aliases[c] for c in columns)} FROM runs r {' '.join(joins)}"
+        if clauses:
+            sql += f" WHERE {' AND '.join(clauses)}"
+        sql += f" ORDER BY {aliases[order_by]} {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+
+        with closing(self._connect()) as db:
+            rows = db.execute(sql, args).fetchall()
+
+        data = list(zip(*rows)) if rows else [()] * len(columns)
+        arrays = []
+        for column in data:
+            if all(isinstance(v, int) for v in column):
+                arrays.append(np.array(column, dtype=np.int64))
+            elif all(isinstance(v, Number) for v in column if v is not None):
+                arrays.append(np.array([np.nan if v is None else v for v in column], dtype=np.float64))
+            else:
+                arrays.append(np.array(column, dtype=object))
+
+        return np.rec.fromarrays(arrays, names=columns)